@@ -4,23 +4,226 @@ Handles intelligent message interpretation and extraction
 PERSON 1: AI Backend Development
 """
 
-import google.generativeai as genai
 import json
-from config import GEMINI_API_KEY, GEMINI_MODEL, NEED_CATEGORIES, LOCATIONS
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from config import (GEMINI_API_KEY, GEMINI_MODEL, NEED_CATEGORIES,
+                    AI_MAX_CONCURRENCY, AI_CALL_TIMEOUT, AI_BATCH_MAX_MESSAGES,
+                    AI_BATCH_CHAR_BUDGET, ANALYSIS_CACHE_ENABLED,
+                    AI_BREAKER_WINDOW, AI_BREAKER_MIN_CALLS, AI_BREAKER_ERROR_RATE,
+                    AI_BREAKER_SLOW_CALL, AI_BREAKER_COOLDOWN)
+from analysis_cache import AnalysisCache
+from llm_scheduler import SchedulerFull
+from keyword_matcher import KeywordMatcher
+from gazetteer import GAZETTEER
 import re
 
+# Keyword tables for the fallback analyzer, compiled once into one matcher
+FALLBACK_NEED_ORDER = ["medical", "food", "water", "shelter", "rescue"]
+FALLBACK_VULNERABLE_ORDER = ["children", "baby", "elderly", "pregnant"]
+FALLBACK_KEYWORDS = KeywordMatcher({
+    ("need", "medical"): ["medical", "doctor", "injury", "sick", "hospital", "medicine",
+                          "breathing", "respiratory"],
+    ("need", "food"): ["food", "hungry", "starving", "eat"],
+    ("need", "water"): ["water", "thirsty", "drink"],
+    ("need", "shelter"): ["shelter", "roof", "homeless", "flood", "house"],
+    ("need", "rescue"): ["rescue", "trapped", "stuck", "drowning"],
+    ("urgency",): ["urgent", "immediately", "dying", "critical", "help"],
+    ("danger",): ["trapped", "drowning", "bleeding"],
+    ("respiratory",): ["not breathing", "can't breathe", "cannot breathe", "respiratory",
+                       "difficulty breathing"],
+    ("vulnerable", "children"): ["child", "children"],
+    ("vulnerable", "baby"): ["baby", "babies", "infant", "newborn"],
+    ("vulnerable", "elderly"): ["elderly", "old", "senior"],
+    ("vulnerable", "pregnant"): ["pregnant"],
+    ("duration",): ["days", "week"],
+    # Exact place names ride along in the same scan
+    **GAZETTEER.keyword_tables(),
+})
+
+# Place names offered to the model
+PROMPT_LOCATIONS = ', '.join(place.name for place in GAZETTEER.places.values())
+
+@lru_cache(maxsize=1024)
+def _fallback_fields(found):
+    """Fallback analysis fields for a set of matched keyword tags"""
+    # Basic need detection (medical first, for breathing emergencies)
+    need_type = "unknown"
+    for need in FALLBACK_NEED_ORDER:
+        if ("need", need) in found:
+            need_type = need
+            break
+    
+    # Urgency scoring
+    urgency_score = 5  # default medium
+    if ("urgency",) in found:
+        urgency_score += 3
+    if ("danger",) in found:
+        urgency_score += 2
+    # Respiratory emergencies are life-threatening
+    if ("respiratory",) in found:
+        urgency_score = 10  # Max urgency for breathing issues (CRITICAL)
+    
+    # Vulnerable groups
+    vulnerable_groups = tuple(group for group in FALLBACK_VULNERABLE_ORDER
+                              if ("vulnerable", group) in found)
+    
+    # Duration detection (extended suffering)
+    extended_duration = ("duration",) in found
+    if extended_duration:
+        urgency_score += 1  # Small boost for extended suffering
+    
+    # The place, if exactly one was named (otherwise the gazetteer decides)
+    places = {tag[1] for tag in found if tag[0] == "place"}
+    place = places.pop() if len(places) == 1 else None
+    
+    return need_type, urgency_score, vulnerable_groups, extended_duration, place
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the model while the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Closed: calls go through and their outcomes fill a rolling window.
+    Open: calls are refused (callers use the fallback) until the cooldown
+    has passed. Half-open: one probe call at a time; success closes the
+    circuit, failure opens it again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window=AI_BREAKER_WINDOW, min_calls=AI_BREAKER_MIN_CALLS,
+                 error_rate=AI_BREAKER_ERROR_RATE, slow_call=AI_BREAKER_SLOW_CALL,
+                 cooldown=AI_BREAKER_COOLDOWN, clock=time.monotonic):
+        """
+        window: seconds of call history the error rate is computed over
+        min_calls: calls needed in the window before the circuit can trip
+        error_rate: failing share of the window that trips the circuit
+        slow_call: seconds after which a successful call still counts as failed
+        cooldown: seconds the circuit stays open before a probe is allowed
+        """
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call = slow_call
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+        self._calls = deque()  # (finished_at, ok, latency), oldest first
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self.trips = 0
+        self.rejected = 0
+
+    def allow(self):
+        """May a model call go ahead now? (False = use the fallback)"""
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() - self._opened_at < self.cooldown:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    self.rejected += 1
+                    return False
+                self._probing = True
+            return True
+
+    def record(self, ok, latency):
+        """Outcome of a call that allow() let through"""
+        ok = ok and latency < self.slow_call
+        with self._lock:
+            now = self.clock()
+            if self.state == self.HALF_OPEN and self._probing:
+                self._probing = False
+                if not ok:
+                    self._trip(now)
+                    return
+                self.state = self.CLOSED
+                self._calls.clear()
+                self._failures = 0
+
+            self._calls.append((now, ok, latency))
+            if not ok:
+                self._failures += 1
+            self._prune(now)
+            if (self.state == self.CLOSED and len(self._calls) >= self.min_calls
+                    and self._failures >= self.error_rate * len(self._calls)):
+                self._trip(now)
+
+    def _prune(self, now):
+        while self._calls and self._calls[0][0] < now - self.window:
+            _, ok, _ = self._calls.popleft()
+            if not ok:
+                self._failures -= 1
+
+    def _trip(self, now):
+        self.state = self.OPEN
+        self._opened_at = now
+        self.trips += 1
+
+    def stats(self):
+        with self._lock:
+            now = self.clock()
+            self._prune(now)
+            latencies = sorted(latency for _, _, latency in self._calls)
+            calls = len(latencies)
+            return {
+                "state": self.state,
+                "window_calls": calls,
+                "window_failures": self._failures,
+                "error_rate": round(self._failures / calls, 3) if calls else 0.0,
+                "latency_p50": round(latencies[calls // 2], 3) if calls else None,
+                "latency_p95": round(latencies[min(calls - 1, int(calls * 0.95))], 3) if calls else None,
+                "retry_in": (round(max(0.0, self.cooldown - (now - self._opened_at)), 1)
+                             if self.state == self.OPEN else None),
+                "trips": self.trips,
+                "rejected": self.rejected
+            }
+
+
 class GeminiMessageProcessor:
-    def __init__(self, api_key=None):
-        """Initialize Gemini AI"""
+    def __init__(self, api_key=None, model=None, cache=True, breaker=None):
+        """
+        Initialize Gemini AI
+        `model` can be any object with generate_content(prompt) - e.g.
+        fake_model.FakeGenerativeModel for offline tests and benchmarks.
+        `cache`: an AnalysisCache, True for the configured default, or
+        None/False to always call the model.
+        `breaker`: a CircuitBreaker (default: one with the configured limits)
+        """
         self.api_key = api_key or GEMINI_API_KEY
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel(GEMINI_MODEL)
+        if model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=self.api_key)
+            model = genai.GenerativeModel(GEMINI_MODEL)
+        self.model = model
+        if cache is True:
+            cache = AnalysisCache() if ANALYSIS_CACHE_ENABLED else None
+        self.cache = cache or None
+        self.breaker = breaker or CircuitBreaker()
         
-    def analyze_message(self, message_text):
+    def analyze_message(self, message_text, timeout=None, fallback=True):
         """
         Use Gemini AI to analyze emergency message
+        timeout: per-call deadline in seconds (default AI_CALL_TIMEOUT;
+            falls back on expiry, as it does while the circuit is open)
+        fallback: on failure return _fallback_analysis (default) or None
         Returns: dict with need_type, location, urgency, vulnerable_groups, etc.
         """
+        if self.cache is not None:
+            cached = self.cache.get(message_text)
+            if cached is not None:
+                return cached
         
         prompt = f"""
 You are an AI assistant for emergency response. Analyze this distress message and extract key information.
@@ -39,96 +242,254 @@ Respond with ONLY a valid JSON object (no markdown, no extra text) with these fi
     "additional_context": "brief relevant details"
 }}
 
-Important locations to check: {', '.join(LOCATIONS)}
+Important locations to check: {PROMPT_LOCATIONS}
 
 Analyze carefully for urgency indicators like: "urgent", "immediately", "dying", "critical", "help", "drowning", "trapped", "bleeding", etc.
 """
 
         try:
-            response = self.model.generate_content(prompt)
-            result_text = response.text.strip()
-            
-            # Clean up markdown code blocks if present
-            result_text = re.sub(r'^```json\s*', '', result_text)
-            result_text = re.sub(r'^```\s*', '', result_text)
-            result_text = re.sub(r'\s*```$', '', result_text)
-            
-            # Parse JSON
-            analysis = json.loads(result_text)
-            
-            # Validate and sanitize
-            analysis['need_type'] = analysis.get('need_type', 'unknown').lower()
-            if analysis['need_type'] not in NEED_CATEGORIES:
-                analysis['need_type'] = 'unknown'
-                
-            analysis['urgency_base_score'] = min(10, max(1, int(analysis.get('urgency_base_score', 5))))
-            analysis['vulnerable_groups'] = analysis.get('vulnerable_groups', [])
-            analysis['has_immediate_danger'] = bool(analysis.get('has_immediate_danger', False))
-            
+            response = self._generate(prompt, timeout)
+            analysis = self._sanitize_analysis(json.loads(self._clean_response_text(response.text)))
+            self._attach_location(analysis, message_text)
+            if self.cache is not None:
+                self.cache.put(message_text, analysis)
             return analysis
             
+        except CircuitOpenError:
+            return self._fallback_analysis(message_text) if fallback else None
         except Exception as e:
             print(f"AI Analysis Error: {e}")
             # Fallback to basic extraction
-            return self._fallback_analysis(message_text)
+            return self._fallback_analysis(message_text) if fallback else None
     
-    def _fallback_analysis(self, message_text):
-        """Fallback keyword-based analysis if AI fails"""
-        msg_lower = message_text.lower()
+    def _generate(self, prompt, timeout=None):
+        """
+        One model call through the circuit breaker, cut off at the deadline.
+        The call runs on a daemon thread so the deadline holds even if the
+        client library ignores its own timeout; an abandoned call finishes
+        (or hangs) in the background while the caller falls back.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("Gemini circuit open")
+        if timeout is None:
+            timeout = AI_CALL_TIMEOUT
+        outcome = {}
+        done = threading.Event()
         
-        # Basic need detection (check medical first for breathing emergencies)
-        need_type = "unknown"
-        # Check medical emergencies FIRST (including respiratory)
-        if any(word in msg_lower for word in ["medical", "doctor", "injury", "sick", "hospital", "medicine", "breathing", "respiratory"]):
-            need_type = "medical"
-        elif any(word in msg_lower for word in ["food", "hungry", "starving", "eat"]):
-            need_type = "food"
-        elif any(word in msg_lower for word in ["water", "thirsty", "drink"]):
-            need_type = "water"
-        elif any(word in msg_lower for word in ["shelter", "roof", "homeless", "flood", "house"]):
-            need_type = "shelter"
-        elif any(word in msg_lower for word in ["rescue", "trapped", "stuck", "drowning"]):
-            need_type = "rescue"
-            
-        # Location detection
-        location = "unknown"
-        for loc in LOCATIONS:
-            if loc.lower() in msg_lower:
-                location = loc
-                break
-                
-        # Urgency scoring
-        urgency_score = 5  # default medium
-        if any(word in msg_lower for word in ["urgent", "immediately", "dying", "critical", "help"]):
-            urgency_score += 3
-        if any(word in msg_lower for word in ["trapped", "drowning", "bleeding"]):
-            urgency_score += 2
-        # Respiratory emergencies are life-threatening
-        if any(phrase in msg_lower for phrase in ["not breathing", "can't breathe", "cannot breathe", "respiratory", "difficulty breathing"]):
-            urgency_score = 10  # Max urgency for breathing issues (CRITICAL)
-            
-        # Vulnerable groups
-        vulnerable_groups = []
-        if any(word in msg_lower for word in ["child", "children"]):
-            vulnerable_groups.append("children")
-        if any(word in msg_lower for word in ["baby", "babies", "infant", "newborn"]):
-            vulnerable_groups.append("baby")
-        if any(word in msg_lower for word in ["elderly", "old", "senior"]):
-            vulnerable_groups.append("elderly")
-        if "pregnant" in msg_lower:
-            vulnerable_groups.append("pregnant")
-            
-        # Duration detection (extended suffering)
-        extended_duration = False
-        if any(phrase in msg_lower for phrase in ["2 days", "3 days", "4 days", "5 days", "days", "week"]):
-            extended_duration = True
-            urgency_score += 1  # Small boost for extended suffering
+        def call():
+            try:
+                outcome['response'] = self.model.generate_content(
+                    prompt, request_options={"timeout": timeout})
+            except Exception as e:
+                outcome['error'] = e
+            finally:
+                done.set()
+        
+        started = time.monotonic()
+        threading.Thread(target=call, name="gemini-call", daemon=True).start()
+        finished = done.wait(timeout)
+        ok = finished and 'error' not in outcome
+        self.breaker.record(ok, time.monotonic() - started)
+        if not finished:
+            raise TimeoutError(f"Gemini call exceeded {timeout}s deadline")
+        if not ok:
+            raise outcome['error']
+        return outcome['response']
+    
+    @staticmethod
+    def _clean_response_text(result_text):
+        """Clean up markdown code blocks if present"""
+        result_text = result_text.strip()
+        result_text = re.sub(r'^```json\s*', '', result_text)
+        result_text = re.sub(r'^```\s*', '', result_text)
+        result_text = re.sub(r'\s*```$', '', result_text)
+        return result_text
+    
+    @staticmethod
+    def _sanitize_analysis(analysis):
+        """Validate and sanitize one analysis object from the model"""
+        if not isinstance(analysis, dict):
+            raise ValueError(f"Expected a JSON object, got {type(analysis).__name__}")
+        
+        analysis['need_type'] = analysis.get('need_type', 'unknown').lower()
+        analysis['location'] = str(analysis.get('location') or 'unknown')
+        if analysis['need_type'] not in NEED_CATEGORIES:
+            analysis['need_type'] = 'unknown'
             
+        analysis['urgency_base_score'] = min(10, max(1, int(analysis.get('urgency_base_score', 5))))
+        analysis['vulnerable_groups'] = analysis.get('vulnerable_groups', [])
+        analysis['has_immediate_danger'] = bool(analysis.get('has_immediate_danger', False))
+        
+        return analysis
+    
+    @staticmethod
+    def _attach_location(analysis, message_text):
+        """Canonical location name plus structured location_info {name, lat, lon}"""
+        place = GAZETTEER.locate(analysis.get('location'), message_text)
+        if place is not None:
+            analysis['location'] = place.name
+        analysis['location_info'] = place.info() if place else None
+        return analysis
+    
+    def plan_batches(self, messages, max_messages=AI_BATCH_MAX_MESSAGES, max_chars=AI_BATCH_CHAR_BUDGET):
+        """
+        Group message indexes into prompt batches. Short SMS pack densely,
+        long ones get fewer neighbours, so every prompt stays near the same
+        size. Returns: list of lists of indexes into messages.
+        """
+        batches = []
+        current, current_chars = [], 0
+        for i, msg in enumerate(messages):
+            if current and (len(current) >= max_messages or current_chars + len(msg) > max_chars):
+                batches.append(current)
+                current, current_chars = [], 0
+            current.append(i)
+            current_chars += len(msg)
+        if current:
+            batches.append(current)
+        return batches
+    
+    def analyze_batch(self, messages, timeout=None, fallback=True):
+        """
+        Analyze several messages with ONE model call.
+        The instructions and location list are sent once; the model answers
+        with a JSON array. Each element is validated on its own and any that
+        is missing or malformed falls back to _fallback_analysis for that
+        message only (or is None if not fallback). Returns analyses in input order.
+        """
+        if len(messages) == 1:
+            return [self.analyze_message(messages[0], timeout=timeout, fallback=fallback)]
+        
+        items = json.dumps([{"index": i, "message": m} for i, m in enumerate(messages)],
+                           ensure_ascii=False)
+        prompt = f"""
+You are an AI assistant for emergency response. Analyze each distress message below and extract key information.
+
+Messages: {items}
+
+Respond with ONLY a valid JSON array (no markdown, no extra text) holding one object per message, in the same order, each with these fields:
+{{
+    "index": "the index of the message this object describes",
+    "need_type": "one of: food, water, medical, shelter, rescue, clothing, unknown",
+    "location": "extracted location or 'unknown'",
+    "urgency_base_score": "number from 1-10",
+    "vulnerable_groups": ["list any: children, elderly, pregnant, disabled, or empty list"],
+    "has_immediate_danger": true/false,
+    "keywords_found": ["list key distress words found"],
+    "estimated_people_count": number or null,
+    "additional_context": "brief relevant details"
+}}
+
+Important locations to check: {PROMPT_LOCATIONS}
+
+Analyze carefully for urgency indicators like: "urgent", "immediately", "dying", "critical", "help", "drowning", "trapped", "bleeding", etc.
+"""
+        
+        results = [None] * len(messages)
+        try:
+            response = self._generate(prompt, timeout)
+            elements = json.loads(self._clean_response_text(response.text))
+            if not isinstance(elements, list):
+                raise ValueError("Expected a JSON array")
+        except Exception as e:
+            print(f"AI Batch Analysis Error: {e}")
+            elements = []
+        
+        for position, element in enumerate(elements):
+            try:
+                index = int(element.pop('index', position)) if isinstance(element, dict) else position
+                if 0 <= index < len(messages) and results[index] is None:
+                    results[index] = self._sanitize_analysis(element)
+                    self._attach_location(results[index], messages[index])
+                    if self.cache is not None:
+                        self.cache.put(messages[index], results[index])
+            except Exception as e:
+                print(f"AI Batch Element Error: {e}")
+        
+        if not fallback:
+            return results
+        return [analysis if analysis is not None else self._fallback_analysis(msg)
+                for msg, analysis in zip(messages, results)]
+    
+    def analyze_batched(self, messages, max_workers=AI_MAX_CONCURRENCY, timeout=AI_CALL_TIMEOUT,
+                        fallback=True, scheduler=None):
+        """
+        Surge ingestion: pack messages into adaptive batches (plan_batches),
+        one model round-trip per batch, batches run concurrently.
+        Returns analyses in input order; with fallback=False a message the
+        model didn't answer for is None instead of a keyword analysis.
+        scheduler: an LLMScheduler to run the batches through (its rate limit
+            and urgency order, at the priority of each batch's most urgent
+            message) instead of max_workers threads of our own
+        """
+        results = [None] * len(messages)
+        pending = list(range(len(messages)))
+        if self.cache is not None:
+            # Repeated texts are answered from the cache and never batched
+            for i in pending:
+                results[i] = self.cache.get(messages[i])
+            pending = [i for i in pending if results[i] is None]
+        
+        batches = [[pending[j] for j in batch]
+                   for batch in self.plan_batches([messages[i] for i in pending])]
+        if not batches:
+            return results
+        if scheduler is not None:
+            return self._analyze_scheduled(messages, batches, results, scheduler, timeout, fallback)
+        workers = max(1, min(max_workers, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gemini") as pool:
+            batch_results = pool.map(
+                lambda batch: self.analyze_batch([messages[i] for i in batch], timeout=timeout,
+                                                 fallback=fallback),
+                batches
+            )
+            for batch, analyses in zip(batches, batch_results):
+                for i, analysis in zip(batch, analyses):
+                    results[i] = analysis
+        return results
+    
+    def _analyze_scheduled(self, messages, batches, results, scheduler, timeout, fallback):
+        """analyze_batched through an LLMScheduler; cache hits never reach it"""
+        futures = []
+        for batch in batches:
+            texts = [messages[i] for i in batch]
+            try:
+                futures.append(scheduler.submit(
+                    lambda texts=texts: self.analyze_batch(texts, timeout=timeout, fallback=fallback),
+                    priority=max(scheduler.estimate_priority(text) for text in texts)))
+            except SchedulerFull as e:
+                print(f"AI Batch Scheduling Error: {e}")
+                futures.append(None)
+        for batch, future in zip(batches, futures):
+            if future is not None:
+                analyses = future.result()
+            elif fallback:
+                analyses = [self._fallback_analysis(messages[i]) for i in batch]
+            else:
+                analyses = [None] * len(batch)
+            for i, analysis in zip(batch, analyses):
+                results[i] = analysis
+        return results
+    
+    @staticmethod
+    def _fallback_analysis(message_text):
+        """Fallback keyword-based analysis if AI fails (one scan per message)"""
+        msg_lower = message_text.lower()
+        found = FALLBACK_KEYWORDS.scan(msg_lower)
+        need_type, urgency_score, vulnerable_groups, extended_duration, place = \
+            _fallback_fields(found)
+        if place is None:
+            # Several places named: the first one wins. None: maybe a typo
+            # (trigram matching only runs when no exact name was found)
+            several = any(tag[0] == "place" for tag in found)
+            place = GAZETTEER.find(msg_lower) if several else GAZETTEER.find_misspelled(msg_lower)
+        
         return {
             "need_type": need_type,
-            "location": location,
+            "location": place.name if place else "unknown",
+            "location_info": place.info() if place else None,
             "urgency_base_score": min(10, urgency_score),
-            "vulnerable_groups": vulnerable_groups,
+            "vulnerable_groups": list(vulnerable_groups),
             "has_immediate_danger": urgency_score >= 8,
             "extended_duration": extended_duration,
             "keywords_found": [],
@@ -136,16 +497,25 @@ Analyze carefully for urgency indicators like: "urgent", "immediately", "dying",
             "additional_context": "Fallback analysis used"
         }
 
-    def batch_analyze(self, messages):
+    def analyze_concurrently(self, messages, max_workers=AI_MAX_CONCURRENCY, timeout=AI_CALL_TIMEOUT):
+        """
+        Analyze many messages with up to max_workers model calls in flight.
+        Each call gets its own timeout; results come back in input order.
+        Throughput scales with max_workers instead of per-call latency.
+        """
+        if not messages:
+            return []
+        workers = max(1, min(max_workers, len(messages)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gemini") as pool:
+            return list(pool.map(lambda msg: self.analyze_message(msg, timeout=timeout), messages))
+
+    def batch_analyze(self, messages, max_workers=AI_MAX_CONCURRENCY):
         """Analyze multiple messages"""
-        results = []
-        for msg in messages:
-            analysis = self.analyze_message(msg)
-            results.append({
-                "original_message": msg,
-                "analysis": analysis
-            })
-        return results
+        analyses = self.analyze_batched(messages, max_workers=max_workers)
+        return [
+            {"original_message": msg, "analysis": analysis}
+            for msg, analysis in zip(messages, analyses)
+        ]
 
 
 # Test function
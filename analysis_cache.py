@@ -0,0 +1,132 @@
+"""
+Content-addressed cache for Gemini message analyses
+Forwarded SMS arrive hundreds of times with the same text; this answers
+repeats from memory (LRU) or disk (SQLite, survives restarts) instead of
+paying for another model call.
+PERSON 1: AI Backend Development
+"""
+
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import ANALYSIS_CACHE_FILE, ANALYSIS_CACHE_SIZE, ANALYSIS_CACHE_TTL
+
+
+class AnalysisCache:
+    def __init__(self, path=ANALYSIS_CACHE_FILE, max_entries=ANALYSIS_CACHE_SIZE,
+                 ttl=ANALYSIS_CACHE_TTL):
+        """
+        path: SQLite file for the persistent tier (None = memory only)
+        max_entries: size of the in-memory LRU tier
+        ttl: seconds an analysis stays valid in either tier
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (stored_at, analysis)
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "key TEXT PRIMARY KEY, analysis TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self.purge_expired()
+
+    @staticmethod
+    def normalize(message_text):
+        """Case and whitespace differences don't change the analysis"""
+        return " ".join(message_text.lower().split())
+
+    def key_for(self, message_text):
+        return hashlib.sha256(self.normalize(message_text).encode('utf-8')).hexdigest()
+
+    def _fresh(self, stored_at, now):
+        return self.ttl is None or now - stored_at < self.ttl
+
+    def _remember(self, key, stored_at, analysis):
+        self._memory[key] = (stored_at, analysis)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, message_text):
+        """Cached analysis for this text (a private copy), or None"""
+        key = self.key_for(message_text)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._fresh(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return copy.deepcopy(entry[1])
+                del self._memory[key]
+                self.expired += 1
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT analysis, stored_at FROM analyses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if self._fresh(row[1], now):
+                        analysis = json.loads(row[0])
+                        self._remember(key, row[1], analysis)
+                        self.disk_hits += 1
+                        return copy.deepcopy(analysis)
+                    with self._conn:
+                        self._conn.execute("DELETE FROM analyses WHERE key = ?", (key,))
+                    self.expired += 1
+
+            self.misses += 1
+            return None
+
+    def put(self, message_text, analysis):
+        key = self.key_for(message_text)
+        now = time.time()
+        analysis = copy.deepcopy(analysis)
+        with self._lock:
+            self._remember(key, now, analysis)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO analyses (key, analysis, stored_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(analysis), now)
+                    )
+
+    def purge_expired(self):
+        """Drop expired entries from both tiers"""
+        if self.ttl is None:
+            return
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for key in [k for k, (stored_at, _) in self._memory.items() if stored_at < cutoff]:
+                del self._memory[key]
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM analyses WHERE stored_at < ?", (cutoff,))
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory)
+            }
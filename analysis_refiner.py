@@ -0,0 +1,105 @@
+"""
+Second phase of two-phase triage
+Messages are stored straight away with the keyword analysis and score
+(analysis_tier "keyword"). In the background the model then produces a
+full analysis, and the message is re-scored and re-ranked in place
+(analysis_tier "ai") with the update pushed to open dashboards. Model calls
+go through an LLMScheduler, most urgent keyword score first.
+PERSON 1: AI Backend Development
+"""
+
+import threading
+from config import REFINE_WORKERS, REFINE_QUEUE_SIZE, AI_CALL_TIMEOUT
+from llm_scheduler import LLMScheduler, SchedulerFull
+
+# Which analysis produced a message's current score
+TIER_KEYWORD = "keyword"
+TIER_AI = "ai"
+
+
+class AnalysisRefiner:
+    def __init__(self, db, priority_engine, event_hub=None, scheduler=None,
+                 timeout=AI_CALL_TIMEOUT):
+        self.db = db
+        self.priority_engine = priority_engine
+        self.event_hub = event_hub
+        self.scheduler = scheduler or LLMScheduler(workers=REFINE_WORKERS,
+                                                   max_queue=REFINE_QUEUE_SIZE)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.refined = 0
+        self.rescored = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def submit(self, message_id, message_text, processor, priority=None, on_refined=None):
+        """
+        Queue a stored message for model refinement; False if the queue is full.
+        processor: a GeminiMessageProcessor, or a function returning one (or
+            None if there is no model) that is called when the refinement runs
+        priority: its keyword-tier total_score (estimated from text if None)
+        on_refined: called with (old record, refined record) after the update,
+            to redo work that depended on the keyword analysis
+        """
+        try:
+            self.scheduler.submit(lambda: self._refine_logged(message_id, message_text, processor,
+                                                              on_refined),
+                                  message_text=message_text, priority=priority)
+            return True
+        except SchedulerFull:
+            with self._lock:
+                self.dropped += 1
+            return False
+
+    def _refine_logged(self, message_id, message_text, processor, on_refined=None):
+        try:
+            return self.refine(message_id, message_text, processor, on_refined)
+        except Exception as e:
+            print(f"Error refining message {message_id}: {e}")
+
+    def refine(self, message_id, message_text, processor, on_refined=None):
+        """
+        Model analysis for one stored message; re-scores and re-ranks it.
+        Returns the updated record, or None if the model failed (the
+        keyword score stays) or the message is gone.
+        """
+        if callable(processor):
+            processor = processor()
+            if processor is None:
+                return None
+        analysis = processor.analyze_message(message_text, timeout=self.timeout, fallback=False)
+        if analysis is None:
+            with self._lock:
+                self.failed += 1
+            return None
+
+        old = self.db.get_message(message_id)
+        if old is None:
+            return None
+        priority = self.priority_engine.calculate_priority_score(analysis)
+        message = self.db.update_message_priority(message_id, priority, analysis,
+                                                  analysis_tier=TIER_AI)
+        if message is None:
+            return None
+        with self._lock:
+            self.refined += 1
+            if priority['total_score'] != old['priority']['total_score']:
+                self.rescored += 1
+        if self.event_hub is not None:
+            self.event_hub.publish('message', message)
+        if on_refined is not None:
+            on_refined(old, message)
+        return message
+
+    def wait_idle(self):
+        """Block until every queued refinement has finished"""
+        self.scheduler.wait_idle()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "refined": self.refined,
+                "rescored": self.rescored,
+                "failed": self.failed,
+                "dropped": self.dropped
+            }
@@ -4,38 +4,156 @@ Real-time dashboard with location filtering
 PERSON 2: Frontend Development
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
 from ai_processor import GeminiMessageProcessor
 from priority_engine import PriorityEngine
 from database import MessageDatabase
 from responder_family_tracker import ResponderFamilyTracker
 from resource_donation_tracker import ResourceDonationTracker
 from route_planner import calculate_delivery_routes
+from event_hub import EventHub
+from sse_server import AsyncSSEServer
+from dedupe import NearDuplicateIndex
+from analysis_refiner import AnalysisRefiner, TIER_KEYWORD, TIER_AI
+from llm_scheduler import LLMScheduler
+from lazy_component import LazyComponent
+from time_rescorer import TimeWindowRescorer
+from scoring_rules import RulesWatcher, RulesError
+from config import (SSE_HEARTBEAT_INTERVAL, SSE_HISTORY_SIZE, SSE_CLIENT_QUEUE_SIZE, SSE_MAX_CLIENTS,
+                    SSE_ASYNC_PORT, SSE_MAX_THREAD_STREAMS,
+                    DEDUPE_ENABLED, DEDUPE_THRESHOLD, RESCORE_ENABLED, LLM_WORKERS,
+                    REFINE_QUEUE_SIZE, AI_INIT_RETRY_SECONDS)
 from datetime import datetime
+from functools import wraps
 import os
+import json
 import base64
+import threading
+import time
+import uuid
+import zlib
 
 app = Flask(__name__)
 
-# Initialize components
-db = MessageDatabase()
-ai_processor = None  # Will initialize when API key is set
+# Initialize components. Anything that reads files or imports the Gemini
+# client is built on first use or by the warm-up thread, so importing this
+# module (a worker restart) stays fast.
 priority_engine = PriorityEngine()
-family_tracker = ResponderFamilyTracker()
-donation_tracker = ResourceDonationTracker()
+db = LazyComponent(lambda: MessageDatabase(priority_engine=priority_engine))
+ai_processor = None  # Will initialize when API key is set (see get_ai_processor)
+family_tracker = LazyComponent(ResponderFamilyTracker)
+donation_tracker = LazyComponent(ResourceDonationTracker)
+event_hub = EventHub(SSE_HISTORY_SIZE, SSE_CLIENT_QUEUE_SIZE, SSE_HEARTBEAT_INTERVAL,
+                     SSE_MAX_CLIENTS)
+sse_server = AsyncSSEServer(event_hub, port=SSE_ASYNC_PORT) if SSE_ASYNC_PORT else None
+_thread_streams = threading.BoundedSemaphore(SSE_MAX_THREAD_STREAMS)
+# Every model call - bulk batches and refinements - shares one rate limit
+# and one urgency order
+llm_scheduler = LLMScheduler(workers=LLM_WORKERS, max_queue=REFINE_QUEUE_SIZE)
+analysis_refiner = AnalysisRefiner(db, priority_engine, event_hub, scheduler=llm_scheduler)
+time_rescorer = TimeWindowRescorer(db, priority_engine, event_hub)
+# New scoring rules take effect at once for new messages; stored ones are
+# re-scored in the background
+rules_watcher = RulesWatcher(priority_engine,
+                             on_reload=lambda rules: time_rescorer.request_full_rescore())
+
+_ai_init_lock = threading.Lock()
+_ai_init_failed_at = None   # time.monotonic() of the last failed setup
+_ai_init_error = None
+_warmup_lock = threading.Lock()
+_warmup_thread = None
 
 def init_ai_processor():
     """Initialize AI processor with API key"""
-    global ai_processor
+    global ai_processor, _ai_init_failed_at, _ai_init_error
     try:
         ai_processor = GeminiMessageProcessor()
+        _ai_init_failed_at = None
+        _ai_init_error = None
         return True
     except Exception as e:
         print(f"Warning: AI processor initialization failed: {e}")
+        _ai_init_failed_at = time.monotonic()
+        _ai_init_error = str(e)
         return False
 
-# Initialize on startup
-init_ai_processor()
+def _ai_init_due():
+    return (_ai_init_failed_at is None
+            or time.monotonic() - _ai_init_failed_at >= AI_INIT_RETRY_SECONDS)
+
+def get_ai_processor():
+    """
+    AI processor, initialized on first use (None if unavailable). A failed
+    initialization is retried after AI_INIT_RETRY_SECONDS, so a transient
+    error during warm-up doesn't disable the model until a restart.
+    """
+    if ai_processor is None and _ai_init_due():
+        with _ai_init_lock:
+            if ai_processor is None and _ai_init_due():
+                init_ai_processor()
+    return ai_processor
+
+def warm_up():
+    """Build the deferred components ahead of the requests that need them"""
+    started = time.perf_counter()
+    try:
+        if sse_server is not None:
+            sse_server.start()
+        get_ai_processor()
+        db.get_version()  # loads the dataset and builds the indexes
+        family_tracker.get()
+        donation_tracker.get()
+        if RESCORE_ENABLED:
+            time_rescorer.start()
+        rules_watcher.start()
+    except Exception as e:
+        print(f"Error during warm-up: {e}")
+    print(f"Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+def start_warm_up():
+    """Start warm_up() on a background thread (once per process)"""
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+            _warmup_thread.start()
+
+@app.before_request
+def _begin_warm_up():
+    # First request of a fresh worker (usually a health check) answers at
+    # once while the components are built behind it
+    if _warmup_thread is None:
+        start_warm_up()
+
+# Versions restart with the process; tag ETags so old ones never match
+BOOT_ID = uuid.uuid4().hex[:8]
+
+def conditional_get(version_fn):
+    """
+    Version-based ETag for a read endpoint. The tag is built from the data
+    version(s) plus the query string, so an unchanged poll is answered
+    with 304 before the view runs - no store access, no serialization.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+            
+            etag = "{}-{}-{}-{:08x}".format(view.__name__, BOOT_ID, version_fn(),
+                                            zlib.crc32(request.query_string))
+            if etag in request.if_none_match:
+                response = Response(status=304)
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Let browsers cache but always revalidate (cheap 304s)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapped
+    return decorator
 
 @app.route('/')
 def dashboard():
@@ -47,28 +165,138 @@ def simple_dashboard():
     """Simple dashboard (legacy)"""
     return render_template('dashboard.html')
 
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(key):
+    """Opaque pagination cursor from a PriorityIndex sort key"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+def decode_cursor(cursor):
+    """PriorityIndex sort key from a cursor; ValueError if it isn't one we issued"""
+    key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(key, list) or len(key) != 3:
+        raise ValueError("malformed cursor")
+    neg_score, received_at, message_id = key
+    # Exact types: the key is compared against stored keys while bisecting
+    if (isinstance(neg_score, bool) or not isinstance(neg_score, (int, float))
+            or not isinstance(received_at, str)
+            or isinstance(message_id, bool) or not isinstance(message_id, int)):
+        raise ValueError("malformed cursor")
+    return (float(neg_score), received_at, message_id)
+
+def project_fields(message, fields):
+    """Keep only the requested (dotted) fields, e.g. analysis.location"""
+    projected = {}
+    for path in fields:
+        parts = path.split('.')
+        value = message
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                break
+            value = value[part]
+        else:
+            target = projected
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+    return projected
+
 @app.route('/api/messages')
+@conditional_get(lambda: db.get_version())
 def get_messages():
-    """API endpoint to get messages with optional location filter"""
+    """
+    API endpoint to get messages with optional location filter
+    Optional: limit + cursor for keyset pagination, fields=id,status,...
+    (dotted paths such as analysis.location) for a slimmer payload
+    """
     location = request.args.get('location', 'all')
     status = request.args.get('status', 'all')
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+    fields = request.args.get('fields')
     
-    if location.lower() == 'all':
-        messages = db.get_all_messages()
+    location_filter = None if location.lower() == 'all' else location
+    status_filter = None if status.lower() == 'all' else status
+    next_cursor = None
+    
+    if limit is None and cursor is None:
+        messages = db.get_top_messages(location=location_filter, status=status_filter)
     else:
-        messages = db.get_messages_by_location(location)
+        try:
+            limit = min(MAX_PAGE_SIZE, max(1, int(limit or MAX_PAGE_SIZE)))
+            after = decode_cursor(cursor) if cursor else None
+        except (TypeError, ValueError):
+            return jsonify({
+                "success": False,
+                "error": "Invalid limit or cursor"
+            }), 400
+        
+        messages, next_key = db.get_messages_page(
+            limit, after=after, location=location_filter, status=status_filter
+        )
+        if next_key is not None:
+            next_cursor = encode_cursor(next_key)
     
-    # Filter by status if specified
-    if status.lower() != 'all':
-        messages = [m for m in messages if m['status'] == status]
+    if fields:
+        field_list = [f.strip() for f in fields.split(',') if f.strip()]
+        messages = [project_fields(m, field_list) for m in messages]
     
+    response = {
+        "success": True,
+        "messages": messages,
+        "count": len(messages)
+    }
+    if limit is not None or cursor is not None:
+        response["next_cursor"] = next_cursor
+    return jsonify(response)
+
+# Aged scores move with the clock, not just the data version
+@app.route('/api/queue')
+@conditional_get(lambda: f"{db.get_version()}.{int(time.time() // 60)}")
+def get_queue():
+    """
+    Pending messages by effective priority: the stored score plus wait-time
+    aging, so long-waiting requests rise instead of starving
+    """
+    location = request.args.get('location', 'all')
+    try:
+        limit = min(MAX_PAGE_SIZE, max(1, int(request.args.get('limit', MAX_PAGE_SIZE))))
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "Invalid limit"
+        }), 400
+    
+    messages = db.get_aged_queue(limit, location=None if location.lower() == 'all' else location)
     return jsonify({
         "success": True,
         "messages": messages,
         "count": len(messages)
     })
 
+@app.route('/api/messages/changes')
+def get_message_changes():
+    """
+    Delta sync: messages created/updated after ?since=<version>, ids of
+    removed messages, and the version to pass next time. Statistics are
+    included only when something changed.
+    """
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({
+            "success": False,
+            "error": "since must be an integer version"
+        }), 400
+    
+    delta = db.get_changes(since)
+    response = {"success": True, **delta}
+    if delta['reset'] or delta['messages'] or delta['removed']:
+        response["statistics"] = db.get_statistics()
+    return jsonify(response)
+
 @app.route('/api/statistics')
+@conditional_get(lambda: db.get_version())
 def get_statistics():
     """API endpoint for dashboard statistics"""
     stats = db.get_statistics()
@@ -89,50 +317,53 @@ def submit_message():
             "error": "Message text is required"
         }), 400
     
-    if ai_processor is None:
-        return jsonify({
-            "success": False,
-            "error": "AI processor not initialized. Please set GEMINI_API_KEY."
-        }), 500
-    
     try:
-        # Step 1: AI Analysis
-        analysis = ai_processor.analyze_message(message_text)
+        # Step 0: A retold/forwarded copy of an open incident is linked to
+        # it and reuses its analysis - no model call, no new row
+        incident = db.find_near_duplicate(message_text)
+        if incident is not None:
+            message_entry = db.add_duplicate_report(incident['id'], message_text)
+            if message_entry is not None:
+                event_hub.publish('message', message_entry)
+                return jsonify({
+                    "success": True,
+                    "message": "Linked to existing incident",
+                    "data": message_entry,
+                    "duplicate_of": message_entry['id'],
+                    "family_safety_alerts": [],
+                    "resource_alert": None
+                })
+        
+        # Step 1: Instant keyword analysis - responders see the message
+        # now; the model refines and re-ranks it in the background
+        analysis = GeminiMessageProcessor._fallback_analysis(message_text)
         
         # Step 2: Priority Calculation
         priority = priority_engine.calculate_priority_score(analysis)
         
-        # Step 3: Store in database
-        message_entry = db.add_message(message_text, analysis, priority)
-        
-        # Step 4: STANDOUT FEATURE - Auto-check responder family safety
-        location = analysis.get('location', 'unknown')
-        family_alerts = []
-        if location != 'unknown':
-            at_risk_families = family_tracker.check_family_safety(location, radius_km=10)
-            if at_risk_families:
-                # Auto-ping families in affected zone
-                pings = family_tracker.auto_ping_families(location)
-                family_alerts = at_risk_families
+        # Step 3: Store in database and push to open dashboards
+        message_entry = db.add_message(message_text, analysis, priority,
+                                       analysis_tier=TIER_KEYWORD)
+        event_hub.publish('message', message_entry)
         
-        # Step 5: STANDOUT FEATURE - Auto-add resource needs
-        need_type = analysis.get('need_type', 'unknown')
+        # Steps 4-5: STANDOUT FEATURES - family safety and resource needs
+        family_alerts, resource_need = run_follow_ups(message_entry)
         resource_alert = None
-        if need_type in ['food', 'water', 'medical', 'shelter'] and location != 'unknown':
-            urgency = priority['urgency_level']
-            # Auto-create resource need
-            resource_need = donation_tracker.add_resource_need(
-                location, 
-                need_type, 
-                "Requested via emergency message",
-                urgency,
-                message_text[:100]
-            )
+        if resource_need is not None:
             resource_alert = {
                 "need_id": resource_need['id'],
-                "nearby_donors": len(donation_tracker.find_nearby_donors(location, need_type))
+                "nearby_donors": len(donation_tracker.find_nearby_donors(
+                    resource_need['location'], resource_need['need_type']))
             }
         
+        # Refine in the background; if the model moves the message, its
+        # follow-ups are redone. (The processor is looked up when the
+        # refinement runs, so a submission during warm-up doesn't wait
+        # for the Gemini client)
+        analysis_refiner.submit(message_entry['id'], message_text, get_ai_processor,
+                                priority=priority['total_score'],
+                                on_refined=follow_ups_refresher(resource_need))
+        
         return jsonify({
             "success": True,
             "message": "Message processed successfully",
@@ -147,6 +378,60 @@ def submit_message():
             "error": str(e)
         }), 500
 
+RESOURCE_NEED_TYPES = ['food', 'water', 'medical', 'shelter']
+
+def run_follow_ups(message_entry, resource_need=None, check_families=True):
+    """
+    STANDOUT FEATURES for a stored message: auto-check (and ping) responder
+    families near it, and auto-add its resource need.
+    resource_need: the need posted for an earlier analysis of the message;
+        it is corrected, or withdrawn if it no longer applies
+    Returns: (family_alerts, resource_need or None)
+    """
+    analysis = message_entry['analysis']
+    location = analysis.get('location', 'unknown')
+    family_alerts = []
+    if check_families and location != 'unknown':
+        at_risk_families = family_tracker.check_family_safety(location, radius_km=10)
+        if at_risk_families:
+            # Auto-ping families in affected zone
+            family_tracker.auto_ping_families(location)
+            family_alerts = at_risk_families
+    
+    need_type = analysis.get('need_type', 'unknown')
+    urgency = message_entry['priority']['urgency_level']
+    if need_type in RESOURCE_NEED_TYPES and location != 'unknown':
+        if resource_need is None:
+            resource_need = donation_tracker.add_resource_need(
+                location,
+                need_type,
+                "Requested via emergency message",
+                urgency,
+                message_entry['original_message'][:100]
+            )
+        else:
+            resource_need = donation_tracker.update_resource_need(
+                resource_need['id'], location=location, need_type=need_type, urgency=urgency)
+    elif resource_need is not None:
+        donation_tracker.update_resource_need(resource_need['id'], status="withdrawn")
+        resource_need = None
+    return family_alerts, resource_need
+
+def follow_ups_refresher(resource_need):
+    """
+    on_refined hook for a submitted message: when the model analysis moves
+    it (location, need or urgency), redo the follow-ups run on the keyword
+    analysis - families near a new location are checked, and the resource
+    need is corrected instead of posting a second one
+    """
+    def on_refined(old, message):
+        old_analysis, analysis = old['analysis'], message['analysis']
+        moved = old_analysis.get('location') != analysis.get('location')
+        if (moved or old_analysis.get('need_type') != analysis.get('need_type')
+                or old['priority']['urgency_level'] != message['priority']['urgency_level']):
+            run_follow_ups(message, resource_need, check_families=moved)
+    return on_refined
+
 @app.route('/api/update_status', methods=['POST'])
 def update_status():
     """API endpoint to update message status"""
@@ -163,7 +448,9 @@ def update_status():
         }), 400
     
     try:
-        db.update_message_status(message_id, status, assigned_to, notes)
+        message = db.update_message_status(message_id, status, assigned_to, notes)
+        if message is not None:
+            event_hub.publish('message', message)
         return jsonify({
             "success": True,
             "message": "Status updated successfully"
@@ -186,18 +473,74 @@ def process_bulk_messages():
             "error": "No messages provided"
         }), 400
     
-    if ai_processor is None:
+    processor = get_ai_processor()
+    if processor is None:
         return jsonify({
             "success": False,
             "error": "AI processor not initialized"
         }), 500
     
+    # Near-duplicates of open incidents are linked straight away; repeats
+    # within this upload wait for the first copy and are linked to it
     processed = []
-    for msg_text in messages:
+    duplicates = 0
+    to_analyze = []      # indexes into messages
+    repeat_of = {}       # index -> index of the earlier copy in this upload
+    upload_index = NearDuplicateIndex(DEDUPE_THRESHOLD) if DEDUPE_ENABLED else None
+    for i, msg_text in enumerate(messages):
+        incident = db.find_near_duplicate(msg_text)
+        if incident is not None:
+            message_entry = db.add_duplicate_report(incident['id'], msg_text)
+            if message_entry is not None:
+                event_hub.publish('message', message_entry)
+                duplicates += 1
+                continue
+        if upload_index is not None:
+            match = upload_index.find(msg_text)
+            if match is not None:
+                repeat_of[i] = match[0]
+                continue
+            upload_index.add(i, msg_text)
+        to_analyze.append(i)
+    
+    # Multi-message prompts, batches run concurrently; then store in order.
+    # Messages the model didn't answer for get the keyword analysis now and
+    # are refined in the background, like single submissions
+    analyses = processor.analyze_batched([messages[i] for i in to_analyze], fallback=False,
+                                         scheduler=llm_scheduler)
+    analyzed = {}
+    tiers = {}
+    for i, analysis in zip(to_analyze, analyses):
+        if analysis is None:
+            analyzed[i] = GeminiMessageProcessor._fallback_analysis(messages[i])
+            tiers[i] = TIER_KEYWORD
+        else:
+            analyzed[i] = analysis
+            tiers[i] = TIER_AI
+    
+    stored = {}          # index -> stored message id
+    for i, msg_text in enumerate(messages):
         try:
-            analysis = ai_processor.analyze_message(msg_text)
-            priority = priority_engine.calculate_priority_score(analysis)
-            message_entry = db.add_message(msg_text, analysis, priority)
+            if i in repeat_of:
+                first = repeat_of[i]
+                if first in stored:
+                    message_entry = db.add_duplicate_report(stored[first], msg_text)
+                    if message_entry is not None:
+                        event_hub.publish('message', message_entry)
+                        duplicates += 1
+                        continue
+                analyzed[i] = analyzed[first]
+                tiers[i] = tiers[first]
+            elif i not in analyzed:
+                continue
+            priority = priority_engine.calculate_priority_score(analyzed[i])
+            message_entry = db.add_message(msg_text, analyzed[i], priority,
+                                           analysis_tier=tiers[i])
+            event_hub.publish('message', message_entry)
+            if tiers[i] == TIER_KEYWORD:
+                analysis_refiner.submit(message_entry['id'], msg_text, processor,
+                                        priority=priority['total_score'])
+            stored[i] = message_entry['id']
             processed.append(message_entry)
         except Exception as e:
             print(f"Error processing message: {e}")
@@ -205,16 +548,112 @@ def process_bulk_messages():
     
     return jsonify({
         "success": True,
-        "message": f"Processed {len(processed)} messages",
-        "processed_count": len(processed)
+        "message": f"Processed {len(processed)} messages ({duplicates} linked as duplicates)",
+        "processed_count": len(processed),
+        "duplicate_count": duplicates
     })
 
+def _too_many_streams():
+    response = jsonify({
+        "success": False,
+        "error": "Too many open event streams"
+    })
+    response.headers["Retry-After"] = "30"
+    return response, 503
+
+@app.route('/api/stream')
+def stream_events():
+    """
+    Server-Sent Events: pushes each new/updated message as it is stored.
+    Reconnecting clients resume from Last-Event-ID (or ?last_event_id=).
+    Redirected to the asyncio stream server when it is running; otherwise
+    each stream holds a server thread, so past SSE_MAX_THREAD_STREAMS (or
+    SSE_MAX_CLIENTS) streams the client gets 503 and keeps polling.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    
+    if sse_server is not None and sse_server.running:
+        # Same host, stream server's port (plain HTTP; set SSE_ASYNC_PORT=0 behind TLS)
+        host = request.host if request.host.endswith(']') else request.host.rsplit(':', 1)[0]
+        location = f"http://{host}:{sse_server.port}/api/stream"
+        if last_event_id is not None:
+            location += f"?last_event_id={last_event_id}"
+        return Response(status=307, headers={"Location": location, "Cache-Control": "no-cache"})
+    
+    if not _thread_streams.acquire(blocking=False):
+        return _too_many_streams()
+    subscriber = event_hub.subscribe(last_event_id)
+    if subscriber is None:
+        _thread_streams.release()
+        return _too_many_streams()
+    
+    def generate():
+        try:
+            yield from event_hub.stream(subscriber)
+        finally:
+            _thread_streams.release()
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 @app.route('/api/health')
 def health_check():
     """Health check endpoint"""
     return jsonify({
         "success": True,
         "ai_processor_ready": ai_processor is not None,
+        "ai_processor_error": _ai_init_error,
+        "warming_up": _warmup_thread is not None and _warmup_thread.is_alive(),
+        "ai_circuit": ai_processor.breaker.stats() if ai_processor is not None else None,
+        "stream_clients": event_hub.client_count(),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/api/rules')
+def get_scoring_rules():
+    """Version of the scoring rules in use (see scoring_rules.json)"""
+    return jsonify({"success": True, **rules_watcher.stats()})
+
+@app.route('/api/rules/reload', methods=['POST'])
+def reload_scoring_rules():
+    """Load scoring_rules.json now instead of waiting for the file watcher"""
+    try:
+        rules = rules_watcher.reload()
+    except RulesError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e),
+            "version": priority_engine.rules_version
+        }), 400
+    return jsonify({
+        "success": True,
+        "version": rules.version,
+        "message": "Rules reloaded; open messages are being re-scored in the background"
+    })
+
+@app.route('/api/metrics')
+def get_metrics():
+    """Operational counters for the ingestion pipeline"""
+    cache = ai_processor.cache if ai_processor is not None else None
+    return jsonify({
+        "success": True,
+        "analysis_cache": cache.stats() if cache is not None else None,
+        "dedupe": db.dedupe_stats(),
+        "refinement": analysis_refiner.stats(),
+        "llm_queue": llm_scheduler.stats(),
+        "time_rescoring": time_rescorer.stats(),
+        "scoring_rules": rules_watcher.stats(),
+        "event_stream": event_hub.stats(),
+        "priority_memo": priority_engine.memo_stats(),
         "timestamp": datetime.now().isoformat()
     })
 
@@ -253,6 +692,7 @@ def check_family_safety():
         }), 500
 
 @app.route('/api/family_safety/all')
+@conditional_get(lambda: family_tracker.version)
 def get_all_family_status():
     """Get status of all responder families"""
     try:
@@ -299,6 +739,7 @@ def update_family_status():
 # ============================================================
 
 @app.route('/api/donations/needs', methods=['GET', 'POST'])
+@conditional_get(lambda: donation_tracker.version)
 def manage_resource_needs():
     """Get or add resource needs"""
     if request.method == 'GET':
@@ -376,6 +817,7 @@ def offer_donation():
         }), 500
 
 @app.route('/api/donations/offers')
+@conditional_get(lambda: donation_tracker.version)
 def get_donation_offers():
     """Get all donation offers"""
     try:
@@ -427,6 +869,7 @@ def get_safe_zones():
 # ========================================================================
 
 @app.route('/api/delivery/routes')
+@conditional_get(lambda: f"{db.get_version()}.{donation_tracker.version}")
 def get_delivery_routes():
     """Get optimized delivery routes matching urgent requests with donations"""
     try:
@@ -463,5 +906,6 @@ if __name__ == '__main__':
     print("   Linux/Mac: export GEMINI_API_KEY='your-key-here'")
     print("\n" + "="*60 + "\n")
     
+    start_warm_up()
     app.run(host='0.0.0.0', port=5000, debug=True)
 
@@ -0,0 +1,45 @@
+"""
+Offline benchmark for bulk message analysis
+Uses fake_model.FakeGenerativeModel (no network, no quota) to compare
+one-at-a-time analysis with the bounded-concurrency and multi-message
+prompt modes.
+Run: python benchmark_analysis.py
+"""
+
+import time
+from ai_processor import GeminiMessageProcessor
+from fake_model import FakeGenerativeModel
+from process_messages import load_emergency_messages
+
+LATENCY = 0.2      # simulated seconds per model call
+BATCH = 100        # messages per run
+
+def timed(label, fn, count):
+    start = time.perf_counter()
+    results = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:6.2f}s  {count / elapsed:7.1f} msg/s")
+    return results
+
+def main():
+    base = load_emergency_messages()
+    messages = [base[i % len(base)] for i in range(BATCH)]
+    # No analysis cache: the sample repeats texts and would hide model latency
+    processor = GeminiMessageProcessor(model=FakeGenerativeModel(latency=LATENCY), cache=None)
+    
+    print(f"{BATCH} messages, {LATENCY * 1000:.0f} ms simulated model latency\n")
+    sequential = timed("sequential", lambda: [processor.analyze_message(m) for m in messages], BATCH)
+    for workers in (4, 16, 32):
+        concurrent = timed(f"concurrent (max_workers={workers})",
+                           lambda: processor.analyze_concurrently(messages, max_workers=workers),
+                           BATCH)
+        assert concurrent == sequential, "concurrent results must match input order"
+    
+    model = processor.model
+    calls_before = model.calls
+    batched = timed("batched prompts", lambda: processor.analyze_batched(messages), BATCH)
+    assert batched == sequential, "batched results must match input order"
+    print(f"\nbatched mode used {model.calls - calls_before} model calls for {BATCH} messages")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Offline load test for /api/process_bulk
+Drives the real Flask route with fake_model.FakeGenerativeModel under a
+few API conditions (healthy, flaky, outage) and reports throughput, model
+calls and how many messages ended up with the fallback analysis.
+Uses a throwaway database; nothing in data/ is touched.
+Run: python benchmark_bulk.py
+"""
+
+import os
+import tempfile
+import time
+
+_workdir = tempfile.mkdtemp(prefix="bulk-bench-")
+os.environ["DB_FILE"] = os.path.join(_workdir, "messages_db.json")
+os.environ.setdefault("DB_BACKEND", "json")  # "journal" isolates model-path costs
+os.environ["ANALYSIS_CACHE_ENABLED"] = "0"
+
+import app as webapp
+from ai_processor import GeminiMessageProcessor
+from fake_model import FakeGenerativeModel
+from config import LOCATIONS
+
+MESSAGES = 200
+
+SCENARIOS = {
+    "healthy": dict(latency=0.3, latency_dist="lognormal", jitter=0.4),
+    "flaky": dict(latency=0.3, latency_dist="lognormal", jitter=0.8, error_rate=0.1,
+                  malformed_rate=0.1, fence_rate=0.5),
+    "outage": dict(latency=0.3, error_rate=1.0),
+}
+
+TEMPLATES = [
+    "Need food urgently near {loc}, {n} people without food for 2 days",
+    "Trapped in flood at {loc} with {n} children please help",
+    "Elderly man needs medicine in {loc}, house number {n}",
+    "No drinking water at {loc} relief camp {n}",
+    "Shelter needed for {n} families after flooding in {loc}",
+]
+
+def make_messages(count):
+    # Distinct numbers keep near-duplicate detection from merging them
+    return [TEMPLATES[i % len(TEMPLATES)].format(loc=LOCATIONS[i % len(LOCATIONS)], n=i + 1)
+            for i in range(count)]
+
+def run(name, model_options, messages):
+    model = FakeGenerativeModel(seed=7, **model_options)
+    webapp.ai_processor = GeminiMessageProcessor(model=model, cache=None)
+    webapp.db.clear_all()
+    client = webapp.app.test_client()
+
+    start = time.perf_counter()
+    response = client.post('/api/process_bulk', json={"messages": messages})
+    elapsed = time.perf_counter() - start
+
+    stored = webapp.db.get_all_messages()
+    fallbacks = sum(1 for msg in stored
+                    if msg['analysis'].get('additional_context') == "Fallback analysis used")
+    faults = model.stats()
+    print(f"{name:<8} {response.status_code}  {elapsed:6.2f}s  {len(messages) / elapsed:7.1f} msg/s  "
+          f"calls={faults['calls']:<3} errors={faults['errors']:<3} malformed={faults['malformed']:<3} "
+          f"fallback={fallbacks:<4} circuit={webapp.ai_processor.breaker.state}")
+
+def main():
+    messages = make_messages(MESSAGES)
+    print(f"{MESSAGES} messages per run, database in {_workdir}\n")
+    for name, options in SCENARIOS.items():
+        run(name, options, messages)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark for the keyword fallback analyzer
+Compares the previous implementation (a separate substring scan per
+keyword list) with the compiled single-pass matcher, and lists messages
+whose output differs - only word-boundary fixes and locations the
+gazetteer now resolves (aliases, typos, places beyond config.LOCATIONS)
+are expected.
+Run: python benchmark_fallback.py
+"""
+
+import gc
+import json
+import statistics
+import time
+from ai_processor import GeminiMessageProcessor
+from config import LOCATIONS, DB_FILE
+from process_messages import load_emergency_messages
+
+ROUNDS = 500       # passes over the sample corpus per timing
+REPEATS = 7        # alternating timings of each analyzer
+
+# Substring hits inside other words that word-start matching drops
+BOUNDARY_EXAMPLES = [
+    "Mother and baby stuck in the cold at Saidapet",   # m-OTHER, c-OLD
+    "Great heat, another night without power",        # gr-EAT, an-OTHER
+]
+
+def legacy_fallback_analysis(message_text):
+    """_fallback_analysis before the compiled matcher, kept for comparison"""
+    msg_lower = message_text.lower()
+
+    need_type = "unknown"
+    if any(word in msg_lower for word in ["medical", "doctor", "injury", "sick", "hospital", "medicine", "breathing", "respiratory"]):
+        need_type = "medical"
+    elif any(word in msg_lower for word in ["food", "hungry", "starving", "eat"]):
+        need_type = "food"
+    elif any(word in msg_lower for word in ["water", "thirsty", "drink"]):
+        need_type = "water"
+    elif any(word in msg_lower for word in ["shelter", "roof", "homeless", "flood", "house"]):
+        need_type = "shelter"
+    elif any(word in msg_lower for word in ["rescue", "trapped", "stuck", "drowning"]):
+        need_type = "rescue"
+
+    location = "unknown"
+    for loc in LOCATIONS:
+        if loc.lower() in msg_lower:
+            location = loc
+            break
+
+    urgency_score = 5
+    if any(word in msg_lower for word in ["urgent", "immediately", "dying", "critical", "help"]):
+        urgency_score += 3
+    if any(word in msg_lower for word in ["trapped", "drowning", "bleeding"]):
+        urgency_score += 2
+    if any(phrase in msg_lower for phrase in ["not breathing", "can't breathe", "cannot breathe", "respiratory", "difficulty breathing"]):
+        urgency_score = 10
+
+    vulnerable_groups = []
+    if any(word in msg_lower for word in ["child", "children"]):
+        vulnerable_groups.append("children")
+    if any(word in msg_lower for word in ["baby", "babies", "infant", "newborn"]):
+        vulnerable_groups.append("baby")
+    if any(word in msg_lower for word in ["elderly", "old", "senior"]):
+        vulnerable_groups.append("elderly")
+    if "pregnant" in msg_lower:
+        vulnerable_groups.append("pregnant")
+
+    extended_duration = False
+    if any(phrase in msg_lower for phrase in ["2 days", "3 days", "4 days", "5 days", "days", "week"]):
+        extended_duration = True
+        urgency_score += 1
+
+    return {
+        "need_type": need_type,
+        "location": location,
+        "urgency_base_score": min(10, urgency_score),
+        "vulnerable_groups": vulnerable_groups,
+        "has_immediate_danger": urgency_score >= 8,
+        "extended_duration": extended_duration,
+        "keywords_found": [],
+        "estimated_people_count": None,
+        "additional_context": "Fallback analysis used"
+    }
+
+def load_corpus():
+    messages = list(load_emergency_messages())
+    try:
+        with open(DB_FILE, 'r') as f:
+            messages += [msg['original_message'] for msg in json.load(f)['messages']]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading {DB_FILE}: {e}")
+    return messages
+
+def time_pass(fn, messages):
+    """Seconds for ROUNDS passes over messages"""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for msg in messages:
+            fn(msg)
+    return time.perf_counter() - start
+
+def compare(before_fn, after_fn, messages):
+    """
+    Times both analyzers in alternation, REPEATS times, with the garbage
+    collector off. Back-to-back pairs see the same machine load, so their
+    ratio (median over pairs) repeats far better than either rate.
+    """
+    before, after = [], []
+    gc.disable()
+    try:
+        for _ in range(REPEATS):
+            before.append(time_pass(before_fn, messages))
+            after.append(time_pass(after_fn, messages))
+    finally:
+        gc.enable()
+    processed = ROUNDS * len(messages)
+    for label, timings in (("substring scans", before), ("compiled matcher", after)):
+        print(f"{label:<22} {processed / statistics.median(timings):10.0f} msg/s  "
+              f"(median; best {processed / min(timings):.0f})")
+    return statistics.median(b / a for b, a in zip(before, after))
+
+def main():
+    messages = load_corpus()
+    print(f"{len(messages)} sample messages x {ROUNDS} rounds, {REPEATS} repeats\n")
+    speedup = compare(legacy_fallback_analysis, GeminiMessageProcessor._fallback_analysis,
+                      messages)
+    print(f"\nspeedup: {speedup:.1f}x (median of {REPEATS} back-to-back pairs)")
+
+    def changes(msg):
+        # Fields the legacy analyzer produced (location_info is new)
+        old, new = legacy_fallback_analysis(msg), GeminiMessageProcessor._fallback_analysis(msg)
+        return {k: (old[k], new[k]) for k in old if old[k] != new[k]}
+
+    # The corpus repeats messages; list each distinct one once
+    differing = [msg for msg in dict.fromkeys(messages + BOUNDARY_EXAMPLES) if changes(msg)]
+    print(f"outputs differ on {len(differing)} of {len(set(messages))} distinct sample messages "
+          f"+ {len(BOUNDARY_EXAMPLES)} boundary examples")
+    for msg in differing:
+        print(f"  {msg!r}: {changes(msg)}")
+
+if __name__ == "__main__":
+    main()
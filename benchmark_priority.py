@@ -0,0 +1,60 @@
+"""
+Benchmark for batch priority scoring
+Re-scores a synthetic backlog of open messages with the scalar path
+(calculate_priority_score per message) and with score_batch, which builds
+full result dicts only for the top rows a dashboard would show. Then
+scores keyword analyses of the sample corpus with and without the
+feature-tuple memo.
+Run: python benchmark_priority.py [messages]
+"""
+
+import sys
+import time
+from datetime import datetime
+
+from ai_processor import GeminiMessageProcessor
+from analysis_samples import sample
+from benchmark_fallback import load_corpus
+from priority_engine import PriorityEngine, NUMPY_AVAILABLE
+
+TOP = 100          # rows that get reasons / breakdown built
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    analyses = sample(count, seed=1)
+    engine = PriorityEngine()
+    timestamp = datetime(2026, 2, 6, 21, 0)
+    print(f"{count} analyses, numpy {'available' if NUMPY_AVAILABLE else 'NOT installed'}\n")
+
+    start = time.perf_counter()
+    scalar = [engine.calculate_priority_score(analysis, timestamp) for analysis in analyses]
+    ranked = sorted(range(count), key=lambda i: scalar[i]['total_score'], reverse=True)[:TOP]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = engine.score_batch(analyses, timestamp)
+    top = batch.results(batch.ranking()[:TOP])
+    batch_time = time.perf_counter() - start
+
+    assert top == [scalar[i] for i in ranked]
+    print(f"scalar      {scalar_time:6.3f}s  {count / scalar_time:10.0f} msg/s")
+    print(f"batch       {batch_time:6.3f}s  {count / batch_time:10.0f} msg/s")
+    print(f"\nspeedup: {scalar_time / batch_time:.1f}x (top {TOP} identical)")
+    memo_benchmark(count, timestamp)
+
+def memo_benchmark(count, timestamp):
+    corpus = [GeminiMessageProcessor._fallback_analysis(msg) for msg in load_corpus()]
+    analyses = (corpus * (count // len(corpus) + 1))[:count]
+    print(f"\n{count} keyword analyses of the sample corpus, scalar path\n")
+    timings = {}
+    for label, memo_size in (("no memo", 0), ("memo", 4096)):
+        engine = PriorityEngine(memo_size=memo_size)
+        start = time.perf_counter()
+        for analysis in analyses:
+            engine.calculate_priority_score(analysis, timestamp)
+        timings[label] = time.perf_counter() - start
+        print(f"{label:<11} {timings[label]:6.3f}s  {count / timings[label]:10.0f} msg/s")
+    print(f"\nspeedup: {timings['no memo'] / timings['memo']:.1f}x  {engine.memo_stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,48 @@ from datetime import datetime
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "your-api-key-here")
 GEMINI_MODEL = "gemini-pro"  # Changed from gemini-1.5-flash to gemini-pro
 
+# A failed Gemini client setup (network, bad key) is retried after this many seconds
+AI_INIT_RETRY_SECONDS = float(os.getenv("AI_INIT_RETRY_SECONDS", "30"))
+
+# Bulk analysis: model calls in flight at once, and per-call timeout (seconds)
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+AI_CALL_TIMEOUT = float(os.getenv("AI_CALL_TIMEOUT", "20"))
+
+# Circuit breaker around model calls: over the last AI_BREAKER_WINDOW
+# seconds, once at least AI_BREAKER_MIN_CALLS calls were made and this share
+# failed (errors, deadline misses, or calls slower than AI_BREAKER_SLOW_CALL
+# seconds), skip the model for AI_BREAKER_COOLDOWN seconds, then probe
+AI_BREAKER_WINDOW = 60
+AI_BREAKER_MIN_CALLS = 5
+AI_BREAKER_ERROR_RATE = 0.5
+AI_BREAKER_SLOW_CALL = float(os.getenv("AI_BREAKER_SLOW_CALL", "8"))
+AI_BREAKER_COOLDOWN = 30
+
+# Multi-message prompts for bulk ingestion: at most this many messages, and
+# roughly this many characters of message text, per model call
+AI_BATCH_MAX_MESSAGES = int(os.getenv("AI_BATCH_MAX_MESSAGES", "20"))
+AI_BATCH_CHAR_BUDGET = int(os.getenv("AI_BATCH_CHAR_BUDGET", "4000"))
+
+# Two-phase triage: messages are stored with the keyword analysis at once,
+# then background workers refine them with the model and re-rank
+REFINE_WORKERS = int(os.getenv("REFINE_WORKERS", "2"))
+REFINE_QUEUE_SIZE = 1000   # pending refinements; beyond this they keep the keyword score
+
+# Model call scheduling under quota: calls started per second (token bucket
+# refill and burst), and seconds of waiting worth one priority point (0-100)
+LLM_RATE_LIMIT = float(os.getenv("LLM_RATE_LIMIT", "2"))
+LLM_BURST = int(os.getenv("LLM_BURST", "5"))
+LLM_AGING_SECONDS_PER_POINT = 1.0
+# Model calls in flight at once through the app's shared scheduler (bulk
+# batches and refinements alike)
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", str(AI_MAX_CONCURRENCY)))
+
+# Analysis cache: identical (normalized) message texts reuse the model's answer
+ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "1") == "1"
+ANALYSIS_CACHE_FILE = os.getenv("ANALYSIS_CACHE_FILE", "data/analysis_cache.sqlite3")
+ANALYSIS_CACHE_SIZE = 5000             # entries kept in memory (LRU)
+ANALYSIS_CACHE_TTL = 24 * 60 * 60      # seconds before an analysis is re-fetched
+
 # Supported locations
 LOCATIONS = ["Tambaram", "Velachery", "Perungudi", "Saidapet", "Other"]
 
@@ -32,8 +74,61 @@ TIME_SENSITIVE_NEEDS = {
     }
 }
 
+# Wait-time aging: a pending (unassigned) message gains this many priority
+# points per hour it waits, by urgency level. Lower levels age faster, so an
+# old MEDIUM request overtakes a stream of fresh HIGH ones.
+AGING_ENABLED = os.getenv("AGING_ENABLED", "1") == "1"
+AGING_POINTS_PER_HOUR = {"CRITICAL": 2.0, "HIGH": 4.0, "MEDIUM": 6.0, "LOW": 6.0}
+
+# Scoring rules (weights, points tables, boosts) for PriorityEngine; the file
+# is checked for changes every RULES_RELOAD_INTERVAL seconds and reloaded
+# without a restart
+SCORING_RULES_FILE = os.getenv("SCORING_RULES_FILE",
+                               os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                            "scoring_rules.json"))
+RULES_RELOAD_INTERVAL = 5
+
+# Memoized priority scores: distinct feature combinations kept (LRU)
+PRIORITY_MEMO_SIZE = 4096
+
+# Time-window re-scoring: the rescorer sleeps until the next hour at which
+# a need type's time sensitivity changes, but re-checks the clock at least
+# this often (seconds) in case it was adjusted
+RESCORE_ENABLED = os.getenv("RESCORE_ENABLED", "1") == "1"
+RESCORE_MAX_SLEEP = 300
+RESCORE_BATCH_SIZE = 1000   # messages scored and written per database call
+
 # Database file
-DB_FILE = "data/messages_db.json"
+DB_FILE = os.getenv("DB_FILE", "data/messages_db.json")
+
+# Storage backend: "json" (single document, legacy), "journal"
+# (append-only log + snapshot) or "sqlite" (indexed)
+DB_BACKEND = os.getenv("DB_BACKEND", "json")
+SQLITE_DB_FILE = os.getenv("SQLITE_DB_FILE", "data/messages.sqlite3")
+
+# Deleted-message tombstones kept for delta sync; older clients do a full resync
+MAX_TOMBSTONES = 10000
+
+# Journal compaction: fold the log into the snapshot every N seconds, or
+# sooner once this many records have been appended
+JOURNAL_COMPACT_INTERVAL = int(os.getenv("JOURNAL_COMPACT_INTERVAL", "60"))
+JOURNAL_COMPACT_THRESHOLD = int(os.getenv("JOURNAL_COMPACT_THRESHOLD", "1000"))
+
+# Near-duplicate detection: retold/forwarded messages at or above this
+# similarity are linked to the open incident instead of stored again
+DEDUPE_ENABLED = os.getenv("DEDUPE_ENABLED", "1") == "1"
+DEDUPE_THRESHOLD = float(os.getenv("DEDUPE_THRESHOLD", "0.8"))
+MAX_DUPLICATE_REPORTS = 20   # duplicate texts kept on an incident (count is exact)
+
+# Server-Sent Events push channel
+SSE_HEARTBEAT_INTERVAL = 15   # seconds between keep-alive comments
+SSE_HISTORY_SIZE = 1000       # events kept for Last-Event-ID resume
+SSE_CLIENT_QUEUE_SIZE = 256   # per-client backlog before forcing a resync
+SSE_MAX_CLIENTS = int(os.getenv("SSE_MAX_CLIENTS", "1000"))   # then 503, clients poll
+# Streams are served from one asyncio loop on this port (0 disables it)
+SSE_ASYNC_PORT = int(os.getenv("SSE_ASYNC_PORT", "5001"))
+# Without it each stream holds a Flask worker thread, so those are capped lower
+SSE_MAX_THREAD_STREAMS = int(os.getenv("SSE_MAX_THREAD_STREAMS", "64"))
 
 # Flask Configuration
 FLASK_HOST = "0.0.0.0"
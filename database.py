@@ -4,134 +4,492 @@ PERSON 1: AI Backend Development
 """
 
 import json
-import os
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from config import DB_FILE
+from config import (DB_FILE, DB_BACKEND, URGENCY_LEVELS, MAX_TOMBSTONES,
+                    DEDUPE_ENABLED, DEDUPE_THRESHOLD, MAX_DUPLICATE_REPORTS)
+from storage import create_storage
+from priority_index import PriorityIndex, AgingIndex
+from priority_engine import PriorityEngine, epoch_hours, received_hours
+from dedupe import NearDuplicateIndex
 
 class MessageDatabase:
-    def __init__(self, db_file=DB_FILE):
+    """
+    Message store with the parsed dataset kept resident in memory.
+    Reads are served from memory; writes go to the storage backend first
+    and reach memory only once it accepted them, so a failed write leaves
+    the cache matching disk. Every change bumps `version`, a monotonically
+    increasing change sequence that is also stamped on the changed record
+    (`change_seq`) so clients can ask for deltas. The backend signature
+    (file mtime for JSON) is re-checked on access so that scripts writing
+    the file directly (add_demo_data.py, process_messages.py) invalidate it.
+    Returned records are shared with the cache - treat them as read-only.
+    """
+
+    def __init__(self, db_file=DB_FILE, backend=DB_BACKEND, storage=None, priority_engine=None):
+        """priority_engine: supplies the aging slopes for get_aged_queue"""
         self.db_file = db_file
-        self._ensure_db_exists()
-    
-    def _ensure_db_exists(self):
-        """Create database file if it doesn't exist"""
-        os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
-        if not os.path.exists(self.db_file):
-            self._save_data({"messages": [], "metadata": {"last_updated": None}})
-    
-    def _load_data(self):
-        """Load data from JSON file"""
-        try:
-            with open(self.db_file, 'r') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading database: {e}")
-            return {"messages": [], "metadata": {"last_updated": None}}
-    
-    def _save_data(self, data):
-        """Save data to JSON file"""
-        try:
-            with open(self.db_file, 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving database: {e}")
-    
-    def add_message(self, original_message, analysis, priority, message_id=None):
-        """Add a new processed message to database"""
-        data = self._load_data()
-        
-        if message_id is None:
-            message_id = len(data['messages']) + 1
-        
-        message_entry = {
-            "id": message_id,
-            "original_message": original_message,
-            "analysis": analysis,
-            "priority": priority,
-            "status": "pending",  # pending, assigned, resolved
-            "received_at": datetime.now().isoformat(),
-            "assigned_to": None,
-            "resolved_at": None,
-            "notes": ""
-        }
-        
-        data['messages'].append(message_entry)
-        data['metadata']['last_updated'] = datetime.now().isoformat()
+        self.storage = storage or create_storage(backend, db_file)
+        self.version = 0
+        self._lock = threading.RLock()
+        self._messages = None
+        self._positions = {}
+        self._index = PriorityIndex()
+        self._aging = AgingIndex()
+        self.priority_engine = priority_engine or PriorityEngine()
+        self._signature = None
+        self._status_counts = {}
+        self._urgency_counts = {}
+        self._location_counts = {}
+        self._change_log = OrderedDict()   # message id -> change_seq, oldest first
+        self._tombstones = OrderedDict()   # deleted id -> change_seq
+        self._resync_before = 0
+        self._dedupe = NearDuplicateIndex(DEDUPE_THRESHOLD) if DEDUPE_ENABLED else None
+        self._dedupe_stale = True
+    
+    def _ensure_cache(self):
+        """(Re)load the dataset if it is missing or changed on disk"""
+        signature = self.storage.signature()
+        if self._messages is not None and signature == self._signature:
+            return
+        data = self.storage.load()
+        self._messages = data['messages']
+        self._positions = {msg['id']: i for i, msg in enumerate(self._messages)}
+        self._index.clear()
+        self._aging.clear()
+        for msg in self._messages:
+            self._index_message(msg)
+        self._signature = signature
+        self._dedupe_stale = True
+        self.rebuild_statistics()
         
-        self._save_data(data)
-        return message_entry
+        # Whatever happened before this (re)load is unknown to the change log:
+        # clients syncing from an older version have to start over
+        stored = max((msg.get('change_seq', 0) for msg in self._messages), default=0)
+        self.version = max(self.version, stored) + 1
+        self._resync_before = self.version
+        self._change_log.clear()
+        self._tombstones.clear()
+    
+    def _index_message(self, msg):
+        self._index.update(msg['id'], msg['priority']['total_score'],
+                           msg['analysis'].get('location'), msg['status'],
+                           msg.get('received_at'))
+        if msg['status'] == "pending":
+            slope = self.priority_engine.aging_slope(msg['priority']['urgency_level'])
+            self._aging.add(msg['id'], msg['priority']['total_score'], slope,
+                            received_hours(msg, epoch_hours(datetime.now())),
+                            msg['analysis'].get('location'))
+        else:
+            self._aging.remove(msg['id'])
+    
+    def _resolve(self, message_ids):
+        return [self._messages[self._positions[message_id]] for message_id in message_ids]
     
-    def get_all_messages(self):
+    def _stamp(self, msg, offset=1):
+        """
+        Stamp a record about to be written with the change sequence it gets
+        once stored (offset: its place in a batch written together)
+        """
+        msg['change_seq'] = self.version + offset
+    
+    def _log_change(self, msg):
+        """Publish a stamped record's change; only after storage accepted it"""
+        self.version = msg['change_seq']
+        self._change_log.pop(msg['id'], None)
+        self._change_log[msg['id']] = self.version
+        self._tombstones.pop(msg['id'], None)
+    
+    def _changed(self):
+        self._signature = self.storage.signature()
+    
+    def get_version(self):
+        """Current data version (cheap; only stats the backing file)"""
+        with self._lock:
+            self._ensure_cache()
+            return self.version
+    
+    def add_message(self, original_message, analysis, priority, message_id=None,
+                    analysis_tier=None):
+        """
+        Add a new processed message to database
+        analysis_tier: which analysis produced the score ("keyword", "ai")
+        """
+        with self._lock:
+            self._ensure_cache()
+            
+            if message_id is None:
+                message_id = len(self._messages) + 1
+                while message_id in self._positions:
+                    message_id += 1
+            
+            message_entry = {
+                "id": message_id,
+                "original_message": original_message,
+                "analysis": analysis,
+                "priority": priority,
+                "analysis_tier": analysis_tier,
+                "status": "pending",  # pending, assigned, resolved
+                "received_at": datetime.now().isoformat(),
+                "assigned_to": None,
+                "resolved_at": None,
+                "notes": ""
+            }
+            
+            self._stamp(message_entry)
+            self.storage.insert_message(message_entry, datetime.now().isoformat())
+            self._log_change(message_entry)
+            self._positions[message_id] = len(self._messages)
+            self._messages.append(message_entry)
+            self._index_message(message_entry)
+            self._count(message_entry, 1)
+            if self._dedupe is not None and not self._dedupe_stale:
+                self._dedupe.add(message_id, original_message)
+            self._changed()
+            return message_entry
+    
+    def _dedupe_index(self):
+        """Near-duplicate index over stored messages, built on first use"""
+        if self._dedupe_stale:
+            self._dedupe.clear()
+            for msg in self._messages:
+                self._dedupe.add(msg['id'], msg['original_message'])
+            self._dedupe_stale = False
+        return self._dedupe
+    
+    def find_near_duplicate(self, original_message):
+        """
+        Open (not resolved) incident whose text is a near-duplicate of this
+        one, or None. Resolved incidents don't match: a new report after
+        resolution is treated as a new emergency.
+        """
+        if self._dedupe is None:
+            return None
+        with self._lock:
+            self._ensure_cache()
+            
+            def is_open(message_id):
+                position = self._positions.get(message_id)
+                return position is not None and self._messages[position]['status'] != "resolved"
+            
+            match = self._dedupe_index().find(original_message, accept=is_open)
+            return None if match is None else self._messages[self._positions[match[0]]]
+    
+    def add_duplicate_report(self, message_id, original_message):
+        """
+        Link a near-duplicate message to an existing incident instead of
+        storing it as a new one; returns the updated incident (None if missing)
+        """
+        with self._lock:
+            self._ensure_cache()
+            position = self._positions.get(message_id)
+            if position is None:
+                return None
+            
+            msg = dict(self._messages[position])
+            msg['report_count'] = msg.get('report_count', 1) + 1
+            reports = list(msg.get('duplicate_reports', []))
+            reports.append({
+                "message": original_message,
+                "received_at": datetime.now().isoformat()
+            })
+            msg['duplicate_reports'] = reports[-MAX_DUPLICATE_REPORTS:]
+            
+            self._replace(position, msg)
+            if self._dedupe is not None:
+                self._dedupe.record_duplicate()
+            return msg
+    
+    def dedupe_stats(self):
+        """Near-duplicate counters (None when detection is disabled)"""
+        return None if self._dedupe is None else self._dedupe.stats()
+    
+    def get_message(self, message_id):
+        """Get a single message by id (None if missing)"""
+        with self._lock:
+            self._ensure_cache()
+            position = self._positions.get(message_id)
+            return None if position is None else self._messages[position]
+    
+    def get_all_messages(self, limit=None):
         """Get all messages sorted by priority"""
-        data = self._load_data()
-        messages = data['messages']
-        
-        # Sort by priority score
-        messages.sort(key=lambda x: x['priority']['total_score'], reverse=True)
-        return messages
+        return self.get_top_messages(limit)
     
-    def get_messages_by_location(self, location):
+    def get_messages_by_location(self, location, limit=None):
         """Filter messages by location"""
-        messages = self.get_all_messages()
-        
         if location.lower() == "all":
-            return messages
+            return self.get_all_messages(limit)
             
-        return [msg for msg in messages if msg['analysis']['location'].lower() == location.lower()]
+        return self.get_top_messages(limit, location=location)
     
-    def get_messages_by_status(self, status="pending"):
+    def get_messages_by_status(self, status="pending", limit=None):
         """Filter messages by status"""
-        messages = self.get_all_messages()
-        return [msg for msg in messages if msg['status'] == status]
+        return self.get_top_messages(limit, status=status)
+    
+    def get_messages_page(self, limit, after=None, location=None, status=None):
+        """
+        Keyset page of messages in priority order.
+        `after` is the sort key of the last message already seen; inserts
+        elsewhere in the ordering never shift a page boundary.
+        Returns: (messages, key of the last message or None if no more)
+        """
+        with self._lock:
+            self._ensure_cache()
+            ids = self._index.ids(location=location, status=status,
+                                  limit=limit + 1, after=after)
+            has_more = len(ids) > limit
+            ids = ids[:limit]
+            next_key = self._index.key_for(ids[-1]) if has_more and ids else None
+            return self._resolve(ids), next_key
+    
+    def get_top_messages(self, limit=None, location=None, status=None):
+        """Highest-priority messages, optionally filtered - O(log N + K)"""
+        with self._lock:
+            self._ensure_cache()
+            return self._resolve(self._index.ids(location=location, status=status, limit=limit))
+    
+    def get_aged_queue(self, limit=None, location=None, now=None):
+        """
+        Pending messages by effective (wait-time-aged) priority, highest
+        first. Each is a copy of the record with "effective_score" added.
+        """
+        now = now or datetime.now()
+        with self._lock:
+            self._ensure_cache()
+            ranked = self._aging.top(epoch_hours(now), limit=limit, location=location)
+            messages = self._resolve([message_id for message_id, _ in ranked])
+        return [{**msg, "effective_score": self.priority_engine.effective_score(msg, now)}
+                for msg in messages]
     
     def update_message_status(self, message_id, status, assigned_to=None, notes=None):
-        """Update message status"""
-        data = self._load_data()
-        
-        for msg in data['messages']:
-            if msg['id'] == message_id:
-                msg['status'] = status
-                if assigned_to:
-                    msg['assigned_to'] = assigned_to
-                if notes:
-                    msg['notes'] = notes
-                if status == "resolved":
-                    msg['resolved_at'] = datetime.now().isoformat()
-                break
-        
-        data['metadata']['last_updated'] = datetime.now().isoformat()
-        self._save_data(data)
+        """Update message status; returns the updated record (None if missing)"""
+        with self._lock:
+            self._ensure_cache()
+            position = self._positions.get(message_id)
+            if position is None:
+                return None
+            
+            # Copy rather than mutate: readers may still hold the old record
+            msg = dict(self._messages[position])
+            msg['status'] = status
+            if assigned_to:
+                msg['assigned_to'] = assigned_to
+            if notes:
+                msg['notes'] = notes
+            if status == "resolved":
+                msg['resolved_at'] = datetime.now().isoformat()
+            
+            self._replace(position, msg)
+            return msg
+    
+    def update_message_priority(self, message_id, priority, analysis=None, analysis_tier=None):
+        """Store a recomputed priority (and optionally analysis) and re-rank it"""
+        with self._lock:
+            self._ensure_cache()
+            position = self._positions.get(message_id)
+            if position is None:
+                return None
+            
+            msg = dict(self._messages[position])
+            msg['priority'] = priority
+            if analysis is not None:
+                msg['analysis'] = analysis
+            if analysis_tier is not None:
+                msg['analysis_tier'] = analysis_tier
+            
+            self._replace(position, msg)
+            return msg
+    
+    def get_open_messages(self, need_types=None):
+        """Messages not yet resolved, optionally only those with these need types"""
+        with self._lock:
+            self._ensure_cache()
+            return [msg for msg in self._messages
+                    if msg['status'] != "resolved"
+                    and (need_types is None or msg['analysis'].get('need_type') in need_types)]
+    
+    def update_message_priorities(self, updates):
+        """
+        Store many recomputed priorities with one storage write.
+        updates: [(message_id, priority, change_seq)]; an update is skipped if
+        the message changed since it was read (its change_seq moved on), so a
+        stale batch never overwrites a fresher analysis or status.
+        Returns the updated records.
+        """
+        with self._lock:
+            self._ensure_cache()
+            updated = []
+            for message_id, priority, change_seq in updates:
+                position = self._positions.get(message_id)
+                if position is None or self._messages[position].get('change_seq') != change_seq:
+                    continue
+                msg = dict(self._messages[position])
+                msg['priority'] = priority
+                self._stamp(msg, offset=len(updated) + 1)
+                updated.append(msg)
+            if not updated:
+                return updated
+            
+            self.storage.update_many(updated, datetime.now().isoformat())
+            for msg in updated:
+                position = self._positions[msg['id']]
+                self._log_change(msg)
+                self._recount(self._messages[position], msg)
+                self._messages[position] = msg
+                self._index_message(msg)
+            self._changed()
+            return updated
+    
+    def _replace(self, position, msg):
+        """Write an updated record through to storage, counters and index"""
+        self._stamp(msg)
+        self.storage.update_message(msg, datetime.now().isoformat())
+        self._log_change(msg)
+        self._recount(self._messages[position], msg)
+        self._messages[position] = msg
+        self._index_message(msg)
+        self._changed()
+    
+    def delete_message(self, message_id):
+        """Remove a message; delta clients receive a tombstone for it"""
+        with self._lock:
+            self._ensure_cache()
+            position = self._positions.pop(message_id, None)
+            if position is None:
+                return False
+            
+            self.storage.delete_message(message_id, datetime.now().isoformat())
+            msg = self._messages[position]
+            last = self._messages.pop()
+            if position < len(self._messages):
+                self._messages[position] = last
+                self._positions[last['id']] = position
+            self._index.remove(message_id)
+            self._aging.remove(message_id)
+            self._count(msg, -1)
+            if self._dedupe is not None:
+                self._dedupe.remove(message_id)
+            
+            self.version += 1
+            self._change_log.pop(message_id, None)
+            self._tombstones[message_id] = self.version
+            if len(self._tombstones) > MAX_TOMBSTONES:
+                _, forgotten = self._tombstones.popitem(last=False)
+                # Clients older than the forgotten tombstone can't be patched
+                self._resync_before = max(self._resync_before, forgotten)
+            self._changed()
+            return True
+    
+    def get_changes(self, since):
+        """
+        Delta since a version: records created/updated after it, ids removed
+        after it, and the current version to ask from next time. If the
+        caller's version predates what the change log covers (restart,
+        external rewrite, clear_all) the full set is returned with reset=True.
+        """
+        with self._lock:
+            self._ensure_cache()
+            if since < self._resync_before or since > self.version:
+                return {
+                    "reset": True,
+                    "messages": self.get_all_messages(),
+                    "removed": [],
+                    "version": self.version
+                }
+            
+            changed = []
+            for message_id in reversed(self._change_log):
+                if self._change_log[message_id] <= since:
+                    break
+                changed.append(message_id)
+            removed = []
+            for message_id in reversed(self._tombstones):
+                if self._tombstones[message_id] <= since:
+                    break
+                removed.append(message_id)
+            
+            return {
+                "reset": False,
+                "messages": self._resolve(reversed(changed)),
+                "removed": removed,
+                "version": self.version
+            }
+    
+    def _count(self, msg, delta):
+        """Apply one record to the statistics counters (+1 add, -1 remove)"""
+        for counter, key in ((self._status_counts, msg['status']),
+                             (self._urgency_counts, msg['priority']['urgency_level']),
+                             (self._location_counts, msg['analysis'].get('location'))):
+            count = counter.get(key, 0) + delta
+            if count:
+                counter[key] = count
+            else:
+                counter.pop(key, None)
+    
+    def _recount(self, old, new):
+        """Move a record between counters after an update (pending→assigned etc.)"""
+        self._count(old, -1)
+        self._count(new, 1)
+    
+    def rebuild_statistics(self):
+        """Recompute the statistics counters from scratch"""
+        with self._lock:
+            self._status_counts = {}
+            self._urgency_counts = {}
+            self._location_counts = {}
+            for msg in self._messages or []:
+                self._count(msg, 1)
+    
+    def check_statistics(self, repair=True):
+        """
+        Consistency check: compare the incremental counters with a full
+        recount. Returns True if they agreed; rebuilds them if not (and repair).
+        """
+        with self._lock:
+            self._ensure_cache()
+            counters = (self._status_counts, self._urgency_counts, self._location_counts)
+            self.rebuild_statistics()
+            consistent = counters == (self._status_counts, self._urgency_counts,
+                                      self._location_counts)
+            if not consistent and not repair:
+                self._status_counts, self._urgency_counts, self._location_counts = counters
+            return consistent
     
     def get_statistics(self):
-        """Get summary statistics"""
-        messages = self.get_all_messages()
-        
-        stats = {
-            "total_messages": len(messages),
-            "by_status": {
-                "pending": len([m for m in messages if m['status'] == 'pending']),
-                "assigned": len([m for m in messages if m['status'] == 'assigned']),
-                "resolved": len([m for m in messages if m['status'] == 'resolved'])
-            },
-            "by_urgency": {
-                "CRITICAL": len([m for m in messages if m['priority']['urgency_level'] == 'CRITICAL']),
-                "HIGH": len([m for m in messages if m['priority']['urgency_level'] == 'HIGH']),
-                "MEDIUM": len([m for m in messages if m['priority']['urgency_level'] == 'MEDIUM']),
-                "LOW": len([m for m in messages if m['priority']['urgency_level'] == 'LOW'])
-            },
-            "by_location": {}
-        }
-        
-        # Count by location
-        for msg in messages:
-            loc = msg['analysis']['location']
-            stats['by_location'][loc] = stats['by_location'].get(loc, 0) + 1
-        
-        return stats
+        """Get summary statistics (maintained incrementally, O(1) in messages)"""
+        with self._lock:
+            self._ensure_cache()
+            return {
+                "total_messages": len(self._messages),
+                "by_status": {
+                    status: self._status_counts.get(status, 0)
+                    for status in ("pending", "assigned", "resolved")
+                },
+                "by_urgency": {
+                    level: self._urgency_counts.get(level, 0)
+                    for level in URGENCY_LEVELS
+                },
+                "by_location": dict(self._location_counts)
+            }
     
     def clear_all(self):
         """Clear all messages (use with caution!)"""
-        self._save_data({"messages": [], "metadata": {"last_updated": datetime.now().isoformat()}})
+        with self._lock:
+            self.storage.clear(datetime.now().isoformat())
+            self._messages = []
+            self._positions = {}
+            self._index.clear()
+            self._aging.clear()
+            if self._dedupe is not None:
+                self._dedupe.clear()
+            self._dedupe_stale = False
+            self.rebuild_statistics()
+            self.version += 1
+            self._resync_before = self.version
+            self._change_log.clear()
+            self._tombstones.clear()
+            self._changed()
 
 
 # Test function
@@ -157,3 +515,4 @@ if __name__ == "__main__":
     print("\nStatistics:")
     stats = db.get_statistics()
     print(json.dumps(stats, indent=2))
+    print("\nCounters consistent:", db.check_statistics())
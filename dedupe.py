@@ -0,0 +1,165 @@
+"""
+Near-duplicate detection for incoming emergency messages
+The same SMS gets forwarded and retyped many times ("Trapped in flood
+Tambaram pls help" / "trapped in flood at tambaram please help!!").
+MinHash signatures over character shingles, bucketed with LSH banding,
+find a similar stored message by looking at a handful of buckets instead
+of comparing against every message.
+PERSON 1: AI Backend Development
+"""
+
+import random
+import re
+import threading
+import zlib
+
+# SMS shorthand spelled out so variants shingle the same way
+ABBREVIATIONS = {
+    "pls": "please", "plz": "please", "pl": "please", "u": "you", "ur": "your",
+    "hlp": "help", "ppl": "people", "wtr": "water", "med": "medical",
+    "immediatly": "immediately", "asap": "urgent", "urgnt": "urgent"
+}
+
+# Filler words that differ between retellings but carry no meaning
+STOPWORDS = {
+    "a", "an", "the", "at", "in", "on", "of", "to", "for", "near", "and",
+    "is", "are", "am", "i", "me", "my", "we", "our", "us", "there", "here"
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def normalize(message_text):
+    """Lowercase words with punctuation, shorthand and filler words removed"""
+    words = (ABBREVIATIONS.get(w, w) for w in _WORD_RE.findall(message_text.lower()))
+    return " ".join(w for w in words if w not in STOPWORDS)
+
+
+class NearDuplicateIndex:
+    def __init__(self, threshold=0.8, shingle_size=4, bands=16, rows=4, seed=1):
+        """
+        threshold: character-shingle Jaccard similarity to count as a duplicate
+        shingle_size: characters per shingle
+        bands, rows: LSH banding of a bands*rows MinHash signature; the
+            defaults surface pairs above ~0.5 similarity as candidates, which
+            are then checked exactly against threshold
+        """
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands = bands
+        self.rows = rows
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(bands * rows)
+        ]
+        self._lock = threading.Lock()
+        self._buckets = {}   # (band, band hash) -> set of ids
+        self._entries = {}   # id -> (band keys, shingles, numbers)
+        self.lookups = 0
+        self.duplicates = 0
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _features(self, message_text):
+        text = normalize(message_text)
+        k = self.shingle_size
+        shingles = frozenset(
+            zlib.crc32(text[i:i + k].encode('utf-8'))
+            for i in range(max(1, len(text) - k + 1))
+        )
+        # "5 people trapped" and "50 people trapped" are different incidents
+        numbers = frozenset(w for w in text.split() if w.isdigit())
+
+        signature = [
+            min((a * shingle + b) % _MERSENNE_PRIME for shingle in shingles)
+            for a, b in self._permutations
+        ]
+        band_keys = [
+            (band, hash(tuple(signature[band * self.rows:(band + 1) * self.rows])))
+            for band in range(self.bands)
+        ]
+        return band_keys, shingles, numbers
+
+    def add(self, item_id, message_text):
+        band_keys, shingles, numbers = self._features(message_text)
+        with self._lock:
+            self._discard(item_id)
+            for key in band_keys:
+                self._buckets.setdefault(key, set()).add(item_id)
+            self._entries[item_id] = (band_keys, shingles, numbers)
+
+    def remove(self, item_id):
+        with self._lock:
+            self._discard(item_id)
+
+    def _discard(self, item_id):
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return
+        for key in entry[0]:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def find(self, message_text, accept=None):
+        """
+        Most similar indexed item at or above the threshold.
+        accept: optional predicate on item ids (e.g. skip resolved incidents)
+        Returns: (item_id, similarity) or None
+        """
+        band_keys, shingles, numbers = self._features(message_text)
+        best = None
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for key in band_keys:
+                candidates.update(self._buckets.get(key, ()))
+            for item_id in candidates:
+                _, other, other_numbers = self._entries[item_id]
+                if other_numbers != numbers:
+                    continue
+                similarity = len(shingles & other) / len(shingles | other)
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    if accept is None or accept(item_id):
+                        best = (item_id, similarity)
+        return best
+
+    def record_duplicate(self):
+        """Count a message that was linked to an existing item instead of stored"""
+        with self._lock:
+            self.duplicates += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "checked": self.lookups,
+                "duplicates": self.duplicates,
+                "dedupe_ratio": round(self.duplicates / self.lookups, 3) if self.lookups else 0.0,
+                "indexed": len(self._entries)
+            }
+
+
+# Test function
+if __name__ == "__main__":
+    index = NearDuplicateIndex()
+    index.add(1, "Trapped in flood Tambaram pls help")
+    index.add(2, "Need food urgently near Tambaram, 5 people")
+    index.add(3, "Medical help needed for elderly person in Velachery")
+
+    print("=== Testing Near-Duplicate Index ===\n")
+    for text in ["trapped in flood at tambaram please help!!",
+                 "Trapped in flood Velachery pls help",
+                 "Need food urgently in Tambaram 5 people",
+                 "Need food urgently near Tambaram, 50 people",
+                 "Medical help needed for elderly person in Perungudi"]:
+        print(f"{text!r} -> {index.find(text)}")
@@ -0,0 +1,159 @@
+"""
+In-process pub/sub hub feeding the Server-Sent Events stream
+Dashboards subscribe once and get new/updated messages pushed instead of
+waiting for the next 30-second poll. Streams are normally served by
+sse_server.AsyncSSEServer, one event loop for every client; stream() is
+the fallback for Flask's threaded server, where each open stream holds a
+worker thread.
+"""
+
+import json
+import threading
+from collections import deque
+
+
+class Subscriber:
+    """
+    One connected client: a bounded queue plus a wake-up flag. push() runs
+    on publishing threads and drain() on the stream's thread, so both hold
+    the subscriber's lock.
+    """
+
+    def __init__(self, max_queue, notify=None):
+        """notify: called (from the publishing thread) when something is queued"""
+        self.max_queue = max_queue
+        self.queue = deque()
+        self.overflowed = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._notify = notify or self._wakeup.set
+
+    def push(self, event):
+        with self._lock:
+            if len(self.queue) >= self.max_queue:
+                # Backpressure: a client this far behind gets a single "resync"
+                # instead of an ever-growing backlog, and re-fetches via delta sync
+                self.queue.clear()
+                self.overflowed = True
+            else:
+                self.queue.append(event)
+        self._notify()
+
+    def request_resync(self):
+        with self._lock:
+            self.queue.clear()
+            self.overflowed = True
+        self._notify()
+
+    def wait(self, timeout):
+        """Block until something is queued or timeout; True if woken"""
+        woken = self._wakeup.wait(timeout)
+        self._wakeup.clear()
+        return woken
+
+    def drain(self):
+        """
+        Take everything queued: (resync needed, events). After an overflow
+        the queued events are dropped too - the resync re-fetches them.
+        """
+        with self._lock:
+            overflowed, self.overflowed = self.overflowed, False
+            events = [] if overflowed else list(self.queue)
+            self.queue.clear()
+        return overflowed, events
+
+
+class EventHub:
+    def __init__(self, history_size=1000, client_queue_size=256, heartbeat_interval=15,
+                 max_clients=1000):
+        """max_clients: streams open at once"""
+        self.client_queue_size = client_queue_size
+        self.heartbeat_interval = heartbeat_interval
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+        self._last_id = 0
+        self.rejected = 0
+
+    def publish(self, event_type, data):
+        """Send an event to every subscriber; returns its event id"""
+        payload = json.dumps(data)  # serialized once, shared by all clients
+        with self._lock:
+            self._last_id += 1
+            event = (self._last_id, event_type, payload)
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.push(event)
+        return event[0]
+
+    def subscribe(self, last_event_id=None, notify=None):
+        """
+        Register a client. With last_event_id (from a reconnecting
+        EventSource) any buffered events after it are replayed first; if the
+        gap is no longer buffered the client is told to resync.
+        notify: wakes the client's stream (see Subscriber); default for stream()
+        Returns None if max_clients streams are already open.
+        """
+        subscriber = Subscriber(self.client_queue_size, notify)
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                self.rejected += 1
+                return None
+            if last_event_id is not None:
+                oldest = self._history[0][0] if self._history else self._last_id + 1
+                if last_event_id > self._last_id or last_event_id + 1 < oldest:
+                    subscriber.request_resync()
+                else:
+                    for event in self._history:
+                        if event[0] > last_event_id:
+                            subscriber.push(event)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def client_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "clients": len(self._subscribers),
+                "max_clients": self.max_clients,
+                "rejected": self.rejected,
+                "last_event_id": self._last_id
+            }
+
+    def pending_frames(self, subscriber):
+        """SSE wire format for everything queued for a subscriber ("" if nothing)"""
+        overflowed, events = subscriber.drain()
+        frames = []
+        if overflowed:
+            with self._lock:
+                resync_id = self._last_id
+            frames.append(f"id: {resync_id}\nevent: resync\ndata: {{}}\n\n")
+        for event_id, event_type, payload in events:
+            frames.append(f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n")
+        return "".join(frames)
+
+    def stream(self, subscriber):
+        """
+        SSE generator for one subscriber, with heartbeats. Runs on the
+        request's worker thread for as long as the client stays connected
+        (idle clients block in wait()).
+        """
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                frames = self.pending_frames(subscriber)
+                if frames:
+                    yield frames
+                if not subscriber.wait(self.heartbeat_interval):
+                    yield ": heartbeat\n\n"
+        finally:
+            self.unsubscribe(subscriber)
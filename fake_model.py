@@ -0,0 +1,152 @@
+"""
+Offline stand-in for the Gemini model
+Implements the generate_content() surface GeminiMessageProcessor uses, so
+bulk ingestion, the fallback paths and the concurrency features can be
+tested and benchmarked without network or quota. Latency, API errors,
+malformed JSON and markdown fences are injected on demand; every random
+choice is seeded from the prompt, so a run is reproducible regardless of
+thread scheduling.
+"""
+
+import json
+import math
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+_MESSAGE_RE = re.compile(r'Message: "(.*?)"\n', re.DOTALL)
+_BATCH_RE = re.compile(r'^Messages: (\[.*\])$', re.MULTILINE)
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+
+class FakeAPIError(Exception):
+    """Injected API failure (what a 503 / 429 from the real service would raise)"""
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    def __init__(self, latency=0.5, latency_dist="fixed", jitter=0.5, error_rate=0.0,
+                 malformed_rate=0.0, fence_rate=0.0, seed=0, max_tracked_prompts=4096):
+        """
+        latency: simulated seconds per call (the median for "lognormal")
+        latency_dist: "fixed", "uniform" (latency * (1 +/- jitter)) or
+            "lognormal" (sigma = jitter; a long tail like a loaded API)
+        error_rate: share of calls raising FakeAPIError after the latency
+        malformed_rate: share of answers that are not valid JSON
+        fence_rate: share of answers wrapped in ```json fences
+        seed: changes which calls get which latency/fault
+        max_tracked_prompts: recent prompts whose attempt count is kept, so
+            a retry draws a fresh outcome; older ones start over at attempt 0
+        """
+        if latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_dist must be one of {LATENCY_DISTRIBUTIONS}")
+        self.latency = latency
+        self.latency_dist = latency_dist
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.fence_rate = fence_rate
+        self.seed = seed
+        self._lock = threading.Lock()
+        self.max_tracked_prompts = max_tracked_prompts
+        self._attempts = OrderedDict()  # prompt checksum -> calls so far (LRU)
+        self.calls = 0
+        self.errors = 0
+        self.malformed = 0
+        self.fenced = 0
+
+    def _rng_for(self, prompt):
+        with self._lock:
+            self.calls += 1
+            key = zlib.crc32(prompt.encode('utf-8'))
+            attempt = self._attempts.pop(key, 0)
+            self._attempts[key] = attempt + 1
+            if len(self._attempts) > self.max_tracked_prompts:
+                self._attempts.popitem(last=False)
+        # str seeds are hashed deterministically (unlike hash(), which is salted)
+        return random.Random(f"{self.seed}:{attempt}:{prompt}")
+
+    def _sample_latency(self, rng):
+        if self.latency_dist == "uniform":
+            return max(0.0, self.latency * (1 + rng.uniform(-self.jitter, self.jitter)))
+        if self.latency_dist == "lognormal":
+            return self.latency * math.exp(rng.gauss(0, self.jitter))
+        return self.latency
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _analysis_for(self, message_text):
+        # Deterministic: the keyword analyzer gives the same answer every time
+        from ai_processor import GeminiMessageProcessor
+        analysis = GeminiMessageProcessor._fallback_analysis(message_text)
+        analysis['additional_context'] = "Fake model analysis"
+        return analysis
+
+    def generate_content(self, prompt, request_options=None):
+        rng = self._rng_for(prompt)
+        latency = self._sample_latency(rng)
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Fake model call exceeded {timeout}s")
+        time.sleep(latency)
+
+        if rng.random() < self.error_rate:
+            self._count('errors')
+            raise FakeAPIError("503 Service Unavailable (injected)")
+
+        batch = _BATCH_RE.search(prompt)
+        if batch:
+            # Multi-message prompt: answer with a JSON array, one per message
+            items = json.loads(batch.group(1))
+            text = json.dumps([
+                {"index": item["index"], **self._analysis_for(item["message"])}
+                for item in items
+            ])
+        else:
+            match = _MESSAGE_RE.search(prompt)
+            message_text = match.group(1) if match else prompt
+            text = json.dumps(self._analysis_for(message_text))
+
+        if rng.random() < self.malformed_rate:
+            self._count('malformed')
+            # Cut off mid-object, as a truncated or chatty answer would be
+            text = "Here is the analysis: " + text[:len(text) // 2]
+        if rng.random() < self.fence_rate:
+            self._count('fenced')
+            text = f"```json\n{text}\n```"
+        return FakeResponse(text)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "malformed": self.malformed,
+                "fenced": self.fenced
+            }
+
+
+# Test function
+if __name__ == "__main__":
+    model = FakeGenerativeModel(latency=0.01, latency_dist="lognormal", error_rate=0.2,
+                                malformed_rate=0.2, fence_rate=0.5, seed=42)
+    prompt = 'Message: "Trapped in flood Tambaram pls help"\n'
+
+    print("=== Testing Fake Gemini Model ===\n")
+    for _ in range(5):
+        try:
+            print(model.generate_content(prompt).text[:80])
+        except FakeAPIError as e:
+            print(f"error: {e}")
+    print(model.stats())
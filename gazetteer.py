@@ -0,0 +1,169 @@
+"""
+Gazetteer: the one place that knows where locations are
+Holds place names, aliases and coordinates, and resolves free text
+("near velacheri bus stand", "T.Nagar", "Velachery (12.97, 80.22)") to a
+structured {name, lat, lon}: one compiled regex pass for names and
+aliases, then a character-trigram index for misspellings.
+PERSON 1: AI Backend Development
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+class Place(namedtuple("Place", ["name", "lat", "lon"])):
+    __slots__ = ()
+
+    def info(self):
+        """The structured location attached to analyses"""
+        return {"name": self.name, "lat": self.lat, "lon": self.lon}
+
+
+# Approximate coordinates for Chennai locations (lat, lon) and the
+# spellings people actually use for them
+PLACES = [
+    ("Tambaram", 12.9249, 80.1000, ["tambram", "thambaram", "east tambaram", "west tambaram"]),
+    ("Velachery", 12.9756, 80.2201, ["velacheri", "vellachery", "velachary"]),
+    ("Perungudi", 12.9610, 80.2433, ["perungudy"]),
+    ("Saidapet", 13.0210, 80.2231, ["saidapettai", "saidai"]),
+    ("Porur", 13.0381, 80.1564, []),
+    ("Adyar", 13.0067, 80.2565, ["adayar"]),
+    ("T Nagar", 13.0418, 80.2341, ["tnagar", "thyagaraya nagar", "thiyagaraya nagar"]),
+    ("Anna Nagar", 13.0850, 80.2101, ["annanagar"]),
+    ("Chrompet", 12.9516, 80.1462, ["chromepet"]),
+    ("Mylapore", 13.0339, 80.2619, ["mylai"]),
+]
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+# Ways people write the gap in a multi-word name ("T Nagar", "T.Nagar")
+_KEYWORD_GAPS = [" ", ".", ". ", "-", ""]
+_COORDS_RE = re.compile(r"\(\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*\)")
+
+
+def _trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Gazetteer:
+    def __init__(self, places=PLACES, min_fuzzy_length=5, fuzzy_threshold=0.7):
+        """
+        places: [(name, lat, lon, [aliases])]
+        min_fuzzy_length: shorter words only match exactly
+        fuzzy_threshold: trigram Dice similarity for a misspelling to match
+        """
+        self.places = {}
+        self._spellings = {}        # "t nagar" (words joined by one space) -> Place
+        self._trigram_index = {}    # trigram -> set of single-word spellings
+        self._word_places = {}      # single-word spelling -> Place
+        self.min_fuzzy_length = min_fuzzy_length
+        self.fuzzy_threshold = fuzzy_threshold
+        for name, lat, lon, aliases in places:
+            place = Place(name, lat, lon)
+            self.places[name.lower()] = place
+            for spelling in [name] + aliases:
+                self._add_spelling(spelling, place)
+        # Longest spelling first, so "east tambaram" beats "tambaram"; any
+        # run of punctuation/space between words matches ("T.Nagar")
+        alternatives = sorted(self._spellings, key=len, reverse=True)
+        self._exact_re = re.compile(r"(?<![a-z0-9])(?:" + "|".join(
+            r"[^a-z0-9]*".join(re.escape(word) for word in spelling.split())
+            for spelling in alternatives) + r")(?![a-z0-9])")
+        self._fuzzy_word = lru_cache(maxsize=4096)(self._fuzzy_word_uncached)
+
+    def _add_spelling(self, spelling, place):
+        words = _WORD_RE.findall(spelling.lower())
+        self._spellings[" ".join(words)] = place
+        if len(words) == 1:
+            self._word_places[words[0]] = place
+            for trigram in _trigrams(words[0]):
+                self._trigram_index.setdefault(trigram, set()).add(words[0])
+
+    def _fuzzy_word_uncached(self, word):
+        """Place whose single-word spelling is closest to word, if close enough"""
+        if len(word) < self.min_fuzzy_length or word.isdigit():
+            return None
+        grams = _trigrams(word)
+        shared = {}
+        for gram in grams:
+            for spelling in self._trigram_index.get(gram, ()):
+                shared[spelling] = shared.get(spelling, 0) + 1
+        best, best_score = None, self.fuzzy_threshold
+        for spelling, count in shared.items():
+            score = 2 * count / (len(grams) + len(_trigrams(spelling)))
+            if score >= best_score:
+                best, best_score = spelling, score
+        return self._word_places[best] if best else None
+
+    def keyword_tables(self):
+        """
+        {("place", Place): [spellings]} for a KeywordMatcher, so a scan that
+        runs anyway also spots exact place names. Such a matcher matches at
+        word starts and knows only the usual gaps in multi-word names; use
+        find() when it reports several places, find_misspelled() when none.
+        """
+        tables = {}
+        for spelling, place in self._spellings.items():
+            words = spelling.split()
+            tables.setdefault(("place", place), {}).update(
+                dict.fromkeys(gap.join(words) for gap in _KEYWORD_GAPS))
+        return {tag: list(spellings) for tag, spellings in tables.items()}
+
+    def find(self, text):
+        """First place mentioned in free text (exact, alias or misspelled), or None"""
+        if not text:
+            return None
+        text = text.lower()
+        exact = self._exact_re.search(text)
+        if exact:
+            return self._spellings[" ".join(_WORD_RE.findall(exact.group()))]
+        return self.find_misspelled(text)
+
+    def find_misspelled(self, text):
+        """First word of text close to a single-word spelling (expects lowercase)"""
+        for word in _WORD_RE.findall(text):
+            if len(word) >= self.min_fuzzy_length:
+                place = self._fuzzy_word(word)
+                if place is not None:
+                    return place
+        return None
+
+    def locate(self, location, message_text=None):
+        """
+        Place for a location string, falling back to the message text.
+        Coordinates written into the string ("Name (lat, lon)", e.g. from
+        a photo's GPS) win over the gazetteer's.
+        """
+        if location and location.lower() not in ("unknown", "other"):
+            coords = _COORDS_RE.search(location)
+            if coords:
+                label = location[:coords.start()].strip()
+                place = self.find(label)
+                return Place(place.name if place else label or location,
+                             float(coords.group(1)), float(coords.group(2)))
+            place = self.find(location)
+            if place is not None:
+                return place
+        return self.find(message_text)
+
+    def location_info(self, location, message_text=None):
+        """Structured {name, lat, lon} for a location (see locate), or None"""
+        place = self.locate(location, message_text)
+        return None if place is None else place.info()
+
+    def coords(self, location):
+        """(lat, lon) of a location string, or None"""
+        place = self.locate(location)
+        return None if place is None else (place.lat, place.lon)
+
+
+GAZETTEER = Gazetteer()
+
+
+# Test function
+if __name__ == "__main__":
+    print("=== Testing Gazetteer ===\n")
+    for text in ["near velacheri bus stand", "Flooding at T.Nagar market",
+                 "stuck in tambram east", "Velachery (12.9756, 80.2219)",
+                 "no other place to go"]:
+        print(f"{text!r} -> {GAZETTEER.location_info(text)}")
@@ -0,0 +1,106 @@
+"""
+Single-pass keyword matcher for the fallback analyzer
+All keyword tables are compiled into one trie-shaped regex. A message is
+scanned once, at word starts only ("old" doesn't fire inside "cold",
+"other" doesn't fire inside "mother"), and every hit is mapped back to
+the table tags it belongs to.
+PERSON 1: AI Backend Development
+"""
+
+import re
+from functools import lru_cache
+
+_WORD_CHAR = re.compile(r"\w")
+
+
+def _word_starts(text):
+    """Positions in text where a \\b-anchored keyword could start"""
+    return [i for i, char in enumerate(text)
+            if _WORD_CHAR.match(char) and (i == 0 or not _WORD_CHAR.match(text[i - 1]))]
+
+
+class KeywordMatcher:
+    def __init__(self, tables, cache_size=4096):
+        """
+        tables: {tag: [keywords]} - a tag is anything hashable, e.g.
+        ("need", "medical"). Keywords match at word starts, so "flood"
+        also covers "flooding" and "child" covers "children".
+        cache_size: distinct keyword combinations whose tag sets are memoized
+        """
+        self.tables = tables
+        own_tags = {}
+        for tag, keywords in tables.items():
+            for keyword in keywords:
+                own_tags.setdefault(keyword.lower(), set()).add(tag)
+
+        # The regex consumes the longest keyword at a word start, so a hit
+        # also stands for every keyword at a word start inside it
+        # ("children" -> "child", "not breathing" -> "breathing")
+        self._tags = {}
+        straddles = False
+        for keyword in own_tags:
+            tags = set()
+            for start in _word_starts(keyword):
+                rest = keyword[start:]
+                for other, other_tags in own_tags.items():
+                    if rest.startswith(other):
+                        tags |= other_tags
+                    elif start and other.startswith(rest):
+                        straddles = True
+            self._tags[keyword] = frozenset(tags)
+
+        pattern = self._trie_pattern(own_tags)
+        if straddles:
+            # Some keyword can begin inside another and run past its end;
+            # match at every word start (zero-width) so neither is lost
+            self._regex = re.compile(r"\b(?=(" + pattern + "))")
+        else:
+            self._regex = re.compile(r"\b(" + pattern + ")")
+        self._tags_for = lru_cache(maxsize=cache_size)(self._collect)
+
+    @staticmethod
+    def _trie_pattern(keywords):
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = True
+
+        def emit(node):
+            branches = [re.escape(char) + emit(child)
+                        for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+            if "" in node:
+                # Greedy optional tail: prefer the longer keyword
+                pattern = "(?:" + pattern + ")?"
+            return pattern
+
+        return emit(trie)
+
+    def _collect(self, hits):
+        found = set()
+        for keyword in hits:
+            found |= self._tags[keyword]
+        return frozenset(found)
+
+    def scan(self, text):
+        """Frozenset of tags whose keywords occur in text (expects lowercase)"""
+        return self._tags_for(frozenset(self._regex.findall(text)))
+
+
+# Test function
+if __name__ == "__main__":
+    matcher = KeywordMatcher({
+        ("need", "medical"): ["medical", "breathing"],
+        ("vulnerable", "children"): ["child", "children"],
+        ("vulnerable", "elderly"): ["elderly", "old"],
+        ("respiratory",): ["not breathing"],
+    })
+
+    print("=== Testing Keyword Matcher ===\n")
+    for text in ["my child is not breathing", "children stuck in the cold",
+                 "old man needs medical help"]:
+        print(f"{text!r} -> {sorted(matcher.scan(text))}")
@@ -0,0 +1,33 @@
+"""
+Deferred construction for app components
+A LazyComponent stands in for an object whose constructor is slow
+(reads data files, opens databases). The real object is built on first
+use - or earlier by a warm-up thread - and every attribute access is
+forwarded to it, so call sites don't change.
+"""
+
+import threading
+
+
+class LazyComponent:
+    def __init__(self, factory):
+        """factory: zero-argument callable building the real component"""
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """The real component, built by the first caller (others wait for it)"""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+                instance = self._instance
+        return instance
+
+    def ready(self):
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
@@ -0,0 +1,178 @@
+"""
+Priority scheduler for rate-limited model calls
+Under quota pressure, model work is started in priority order rather
+than arrival order, at most LLM_RATE_LIMIT calls per second (token
+bucket). Priority is estimated cheaply with the keyword analyzer, and
+waiting items age so low-priority work is delayed, never starved.
+PERSON 1: AI Backend Development
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from config import LLM_RATE_LIMIT, LLM_BURST, LLM_AGING_SECONDS_PER_POINT
+
+
+class SchedulerFull(Exception):
+    """Raised by submit() when the queue is at max_queue"""
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        """rate: tokens added per second; capacity: largest burst"""
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available; otherwise seconds until one is"""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def available(self):
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class LLMScheduler:
+    # Priority bands reported in the wait-time metrics (0-100 score scale)
+    BANDS = (("critical", 80), ("high", 60), ("medium", 40), ("low", 0))
+
+    def __init__(self, rate=LLM_RATE_LIMIT, burst=LLM_BURST, workers=2, max_queue=1000,
+                 aging=LLM_AGING_SECONDS_PER_POINT):
+        """
+        rate, burst: token bucket limiting model calls per second
+        workers: calls in flight at once (threads)
+        max_queue: queued items before submit() refuses more
+        aging: seconds of waiting worth one priority point, so an item
+            waits at most (priority gap * aging) behind later, more
+            urgent work
+        """
+        self.bucket = TokenBucket(rate, burst)
+        self.workers = workers
+        self.max_queue = max_queue
+        self.aging = aging
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._active = 0
+        self._waits = deque(maxlen=1000)  # (band, seconds queued), most recent
+        self.submitted = 0
+        self.completed = 0
+
+    @staticmethod
+    def estimate_priority(message_text):
+        """Cheap 0-100 urgency estimate from the keyword analyzer"""
+        from ai_processor import GeminiMessageProcessor
+        return GeminiMessageProcessor._fallback_analysis(message_text)['urgency_base_score'] * 10
+
+    @classmethod
+    def band_for(cls, priority):
+        return next(name for name, floor in cls.BANDS if priority >= floor)
+
+    def _start(self):
+        # caller holds self._cond
+        if not self._threads:
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"llm-scheduler-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, fn, message_text=None, priority=None):
+        """
+        Queue fn() (a model call) to run when a token is free and nothing
+        more urgent is waiting. priority defaults to estimate_priority().
+        Returns a Future for fn's result; raises SchedulerFull.
+        """
+        if priority is None:
+            priority = self.estimate_priority(message_text or "")
+        future = Future()
+        enqueued = time.monotonic()
+        # Aging in closed form: ordering by (arrival - priority * aging)
+        # equals ordering by priority + waited / aging, and never changes
+        # while items wait, so a plain heap stays valid
+        key = enqueued - priority * self.aging
+        with self._cond:
+            if len(self._heap) >= self.max_queue:
+                raise SchedulerFull(f"{len(self._heap)} model calls already queued")
+            self._start()
+            heapq.heappush(self._heap, (key, next(self._seq), enqueued, priority, fn, future))
+            self.submitted += 1
+            self._cond.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # Only take an item once a call may start, so anything more
+                # urgent arriving while we wait for a token still goes first
+                while True:
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self.bucket.try_acquire()
+                    if not delay:
+                        break
+                    self._cond.wait(delay)
+                _, _, enqueued, priority, fn, future = heapq.heappop(self._heap)
+                self._active += 1
+                self._waits.append((self.band_for(priority), time.monotonic() - enqueued))
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn())
+                    except Exception as e:
+                        future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self.completed += 1
+                    self._cond.notify_all()
+
+    def wait_idle(self):
+        """Block until the queue is empty and no call is running"""
+        with self._cond:
+            while self._heap or self._active:
+                self._cond.wait()
+
+    @staticmethod
+    def _summary(values):
+        values = sorted(values)
+        return {
+            "count": len(values),
+            "p50": round(values[len(values) // 2], 3),
+            "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3)
+        }
+
+    def stats(self):
+        with self._cond:
+            now = time.monotonic()
+            waits = {}
+            for band, seconds in self._waits:
+                waits.setdefault(band, []).append(seconds)
+            return {
+                "queue_depth": len(self._heap),
+                "in_flight": self._active,
+                "oldest_wait": round(max((now - item[2] for item in self._heap), default=0.0), 3),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "tokens_available": round(self.bucket.available(), 2),
+                "wait_seconds": {band: self._summary(values) for band, values in waits.items()}
+            }
@@ -0,0 +1,72 @@
+"""
+Startup time measurement for the Flask app
+Each run is a fresh interpreter (a cold worker): times the heavy imports
+on their own, `import app`, the first 200 from /api/health, and when the
+background warm-up has finished building the deferred components.
+The probe runs in a scratch directory holding a copy of data/, with the
+rescorer and the stream server off, so it never writes the real dataset.
+Run: python measure_startup.py [runs]
+"""
+
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROBE = r"""
+import json, time
+start = time.perf_counter()
+timings = {}
+for name in ("flask", "google.generativeai"):
+    t = time.perf_counter()
+    try:
+        __import__(name)
+        timings["import " + name] = time.perf_counter() - t
+    except ImportError:
+        pass
+t = time.perf_counter()
+import app
+timings["import app (rest)"] = time.perf_counter() - t
+response = app.app.test_client().get('/api/health')
+assert response.status_code == 200, response.status_code
+timings["first /api/health 200"] = time.perf_counter() - start
+app._warmup_thread.join()
+timings["warm-up complete"] = time.perf_counter() - start
+# Don't exit with a background thread part-way through a write
+app.rules_watcher.stop()
+app.time_rescorer.stop()
+print("STARTUP " + json.dumps(timings))
+"""
+
+def measure_once():
+    with tempfile.TemporaryDirectory() as workdir:
+        shutil.copytree(os.path.join(REPO_DIR, "data"), os.path.join(workdir, "data"))
+        env = dict(os.environ,
+                   PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.getenv("PYTHONPATH")])),
+                   DB_FILE=os.path.join(workdir, "data", "messages_db.json"),
+                   SQLITE_DB_FILE=os.path.join(workdir, "data", "messages.sqlite3"),
+                   ANALYSIS_CACHE_FILE=os.path.join(workdir, "data", "analysis_cache.sqlite3"),
+                   RESCORE_ENABLED="0",
+                   SSE_ASYNC_PORT="0")
+        result = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True,
+                                cwd=workdir, env=env)
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return json.loads(line[len("STARTUP "):])
+    raise RuntimeError(f"Startup probe failed:\n{result.stdout}\n{result.stderr}")
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    samples = [measure_once() for _ in range(runs)]
+    print(f"median of {runs} cold starts (imports: own duration; others: since probe start)\n")
+    for key in samples[0]:
+        values = [sample[key] for sample in samples if key in sample]
+        print(f"{key:<26} {statistics.median(values):7.3f}s")
+
+if __name__ == "__main__":
+    main()
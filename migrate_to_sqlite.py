@@ -0,0 +1,29 @@
+"""
+One-shot migration of data/messages_db.json into the SQLite backend
+Run once, then start the app with DB_BACKEND=sqlite
+"""
+
+import os
+from config import DB_FILE, SQLITE_DB_FILE
+from storage import SQLiteStorage, migrate_json_to_sqlite
+
+def main():
+    if not os.path.exists(DB_FILE):
+        print(f"Nothing to migrate: {DB_FILE} not found")
+        return
+    
+    storage = SQLiteStorage(SQLITE_DB_FILE)
+    existing = storage.count_messages()
+    if existing:
+        print(f"{SQLITE_DB_FILE} already holds {existing} messages - skipping migration")
+        print("Delete the SQLite file first to re-run it.")
+        return
+    
+    count = migrate_json_to_sqlite(DB_FILE, storage)
+    storage.close()
+    
+    print(f"✓ Migrated {count} messages from {DB_FILE} to {SQLITE_DB_FILE}")
+    print("Start the app with DB_BACKEND=sqlite to use it.")
+
+if __name__ == "__main__":
+    main()
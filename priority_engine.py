@@ -4,188 +4,546 @@ Ranks emergency messages based on multiple factors
 PERSON 1: AI Backend Development
 """
 
-from datetime import datetime
-from config import TIME_SENSITIVE_NEEDS, URGENCY_LEVELS
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from config import (TIME_SENSITIVE_NEEDS, URGENCY_LEVELS, AGING_ENABLED, AGING_POINTS_PER_HOUR,
+                    PRIORITY_MEMO_SIZE)
+from frozen import FrozenDict, FrozenList
+from scoring_rules import load_rules
+
+# NumPy is optional: without it score_batch falls back to the scalar path
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+class ScoreMemo:
+    """Bounded LRU of computed scores, with hit-rate counters"""
+
+    def __init__(self, maxsize=PRIORITY_MEMO_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def count_uncacheable(self):
+        with self._lock:
+            self.uncacheable += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "uncacheable": self.uncacheable,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "invalidations": self.invalidations
+            }
+
 
 class PriorityEngine:
-    def __init__(self):
-        self.weights = {
-            "base_urgency": 0.30,
-            "time_sensitivity": 0.25,
-            "vulnerable_groups": 0.20,
-            "immediate_danger": 0.15,
-            "people_count": 0.10
-        }
+    def __init__(self, aging_rates=None, rules=None, memo_size=PRIORITY_MEMO_SIZE):
+        """
+        aging_rates: {urgency_level: points per hour waited} (default from config)
+        rules: compiled ScoringRules (default: loaded from SCORING_RULES_FILE)
+        memo_size: distinct feature combinations whose scores are kept (0: off)
+        """
+        self.rules = rules or load_rules()
+        self.memo = ScoreMemo(memo_size) if memo_size else None
+        if aging_rates is None:
+            aging_rates = AGING_POINTS_PER_HOUR if AGING_ENABLED else {}
+        self.aging_rates = dict(aging_rates)
+    
+    def set_rules(self, rules):
+        """Swap in a new compiled rule set (a single assignment: atomic)"""
+        self.rules = rules
+        if self.memo is not None:
+            # Entries are keyed by rule set, so none could be served any more;
+            # this just frees them
+            self.memo.clear()
+    
+    @property
+    def rules_version(self):
+        return self.rules.version
+    
+    @property
+    def weights(self):
+        return self.rules.weights
+    
+    def memo_stats(self):
+        return self.memo.stats() if self.memo is not None else None
+    
+    def _feature_key(self, analysis, timestamp, rules):
+        """
+        Everything the score, breakdown and reasons depend on, normalized
+        (None if a value is unhashable). Covers every analysis field the
+        rules read; the hour enters through the time-sensitivity score.
+        """
+        need_type = analysis.get('need_type', 'unknown')
+        groups = analysis.get('vulnerable_groups', [])
+        try:
+            people_score = self._calculate_people_score(
+                analysis.get('estimated_people_count'), rules)
+            # The reason text shows the count as given: 3 and 3.0 differ there
+            shown_count = (repr(analysis.get('estimated_people_count', 0))
+                           if people_score > rules.people_reason_above else None)
+            key = (rules, need_type,
+                   analysis.get('urgency_base_score', rules.base_default),
+                   # Order and repeats show in the reason text
+                   type(groups), tuple(groups),
+                   bool(analysis.get('has_immediate_danger', False)),
+                   people_score, shown_count,
+                   bool(analysis.get('extended_duration', False)),
+                   self._calculate_time_sensitivity(need_type, timestamp, rules))
+            hash(key)
+        except TypeError:
+            return None
+        return key
     
     def calculate_priority_score(self, analysis, timestamp=None):
         """
         Calculate comprehensive priority score
         Returns: dict with total_score, urgency_level, reasons
+        Analyses with the same features share one (immutable) breakdown
+        and reasons list; only the timestamp is per call.
         """
         if timestamp is None:
             timestamp = datetime.now()
-            
+        rules = self.rules  # one rule set for the whole calculation, even mid-reload
+        memo = self.memo
+        
+        key = None
+        entry = None
+        if memo is not None:
+            key = self._feature_key(analysis, timestamp, rules)
+            if key is None:
+                memo.count_uncacheable()
+            else:
+                entry = memo.get(key)
+        if entry is None:
+            entry = self._score(analysis, timestamp, rules)
+            if key is not None:
+                memo.put(key, entry)
+        
+        total_score, urgency_level, score_breakdown, reasons = entry
+        return {
+            "total_score": total_score,
+            "urgency_level": urgency_level,
+            "score_breakdown": score_breakdown,
+            "priority_reasons": reasons,
+            "timestamp": timestamp.isoformat(),
+            "rules_version": rules.version
+        }
+    
+    def _score(self, analysis, timestamp, rules):
+        """
+        The scoring itself
+        Returns: (total_score, urgency_level, breakdown, reasons), the last
+        two frozen
+        """
         score_breakdown = {}
         reasons = []
         
         # 1. Base urgency from AI (0-10 scale, normalized to 0-100)
-        base_score = analysis.get('urgency_base_score', 5) * 10
-        score_breakdown['base_urgency'] = base_score * self.weights['base_urgency']
+        base_score = analysis.get('urgency_base_score', rules.base_default) * rules.base_scale
+        score_breakdown['base_urgency'] = base_score * rules.weights['base_urgency']
         
-        if base_score >= 80:
+        if base_score >= rules.base_reason_at:
             reasons.append("High urgency keywords detected")
         
         # 2. Time sensitivity (0-100 scale)
         time_score = self._calculate_time_sensitivity(
             analysis.get('need_type', 'unknown'),
-            timestamp
+            timestamp,
+            rules
         )
-        score_breakdown['time_sensitivity'] = time_score * self.weights['time_sensitivity']
+        score_breakdown['time_sensitivity'] = time_score * rules.weights['time_sensitivity']
         
-        if time_score > 70:
+        if time_score > rules.time_reason_above:
             need_type = analysis.get('need_type', 'unknown')
             if need_type in TIME_SENSITIVE_NEEDS:
                 reasons.append(TIME_SENSITIVE_NEEDS[need_type]['reason'])
         
         # 3. Vulnerable groups multiplier (0-100)
         vulnerable_score = self._calculate_vulnerable_score(
-            analysis.get('vulnerable_groups', [])
+            analysis.get('vulnerable_groups', []),
+            rules
         )
-        score_breakdown['vulnerable_groups'] = vulnerable_score * self.weights['vulnerable_groups']
+        score_breakdown['vulnerable_groups'] = vulnerable_score * rules.weights['vulnerable_groups']
         
         if vulnerable_score > 0:
             groups = analysis.get('vulnerable_groups', [])
             reasons.append(f"Vulnerable groups present: {', '.join(groups)}")
         
         # 4. Immediate danger bonus (0 or 100)
-        danger_score = 100 if analysis.get('has_immediate_danger', False) else 0
-        score_breakdown['immediate_danger'] = danger_score * self.weights['immediate_danger']
+        danger_score = rules.danger_points if analysis.get('has_immediate_danger', False) else 0
+        score_breakdown['immediate_danger'] = danger_score * rules.weights['immediate_danger']
         
         if danger_score > 0:
             reasons.append("Life-threatening situation detected")
         
         # 5. People count factor (scaled to 0-100)
         people_score = self._calculate_people_score(
-            analysis.get('estimated_people_count')
+            analysis.get('estimated_people_count'),
+            rules
         )
-        score_breakdown['people_count'] = people_score * self.weights['people_count']
+        score_breakdown['people_count'] = people_score * rules.weights['people_count']
         
-        if people_score > 50:
+        if people_score > rules.people_reason_above:
             count = analysis.get('estimated_people_count', 0)
             reasons.append(f"Multiple people affected ({count})")
         
         # Calculate total
         total_score = sum(score_breakdown.values())
         
-        # 6. Extended duration bonus (suffering for days) - added after base calculation
-        extended_duration_boost = 0
-        if analysis.get('extended_duration', False):
-            need_type = analysis.get('need_type', 'unknown')
-            # Water and food deprivation for days is serious
-            if need_type in ['water', 'food']:
-                extended_duration_boost = 12  # Larger boost for water/food deprivation
-            else:
-                extended_duration_boost = 8  # Moderate boost for other extended situations
-            total_score += extended_duration_boost
-            reasons.append("Extended duration - suffering for multiple days")
-        
-        # 7. Special case: Baby/infant with immediate danger = CRITICAL
-        vulnerable_groups = analysis.get('vulnerable_groups', [])
-        if 'baby' in vulnerable_groups and analysis.get('has_immediate_danger', False):
-            total_score += 15  # Extra boost for babies in immediate danger
-            reasons.append("CRITICAL: Baby/infant with life-threatening emergency")
-        
-        # 8. Water deprivation with vulnerable groups = HIGH priority
-        need_type = analysis.get('need_type', 'unknown')
-        if need_type == 'water' and len(vulnerable_groups) > 0 and analysis.get('extended_duration', False):
-            total_score += 12  # Water deprivation with children/vulnerable is serious
-            reasons.append("Water deprivation with vulnerable groups")
+        # 6. Boosts added after the weighted sum (extended duration, baby in
+        # danger, water deprivation ...), in rule order
+        for boost in rules.apply_boosts(analysis):
+            total_score += boost.points
+            reasons.append(boost.reason)
         
         # Determine urgency level
-        urgency_level = self._get_urgency_level(total_score)
+        urgency_level = rules.urgency_level(total_score)
         
-        return {
-            "total_score": round(total_score, 2),
-            "urgency_level": urgency_level,
-            "score_breakdown": {k: round(v, 2) for k, v in score_breakdown.items()},
-            "priority_reasons": reasons,
-            "timestamp": timestamp.isoformat()
-        }
+        return (round(total_score, 2), urgency_level,
+                FrozenDict((k, round(v, 2)) for k, v in score_breakdown.items()),
+                FrozenList(reasons))
     
-    def _calculate_time_sensitivity(self, need_type, timestamp):
+    def _calculate_time_sensitivity(self, need_type, timestamp, rules=None):
         """Calculate time-based urgency (nighttime shelter, etc.)"""
+        rules = rules or self.rules
         current_hour = timestamp.hour
         
         if need_type in TIME_SENSITIVE_NEEDS:
             critical_hours = TIME_SENSITIVE_NEEDS[need_type]['critical_hours']
             if current_hour in critical_hours:
-                return 100  # Maximum priority during critical hours
+                return rules.time_critical  # Maximum priority during critical hours
             else:
-                return 50   # Still important, but less critical
+                return rules.time_other   # Still important, but less critical
         
-        return 30  # Default for non-time-sensitive needs
+        return rules.time_default  # Default for non-time-sensitive needs
     
-    def _calculate_vulnerable_score(self, vulnerable_groups):
+    def next_time_change(self, need_type, timestamp):
+        """
+        Start of the next hour after timestamp at which need_type's time
+        sensitivity score changes (None if it never does)
+        """
+        current = self._calculate_time_sensitivity(need_type, timestamp)
+        hour_start = timestamp.replace(minute=0, second=0, microsecond=0)
+        for hours in range(1, 25):
+            boundary = hour_start + timedelta(hours=hours)
+            if self._calculate_time_sensitivity(need_type, boundary) != current:
+                return boundary
+        return None
+    
+    def time_score_changed(self, need_type, scored_at, now):
+        """Whether a score computed at scored_at has a different time sensitivity now"""
+        return (self._calculate_time_sensitivity(need_type, scored_at)
+                != self._calculate_time_sensitivity(need_type, now))
+    
+    def _calculate_vulnerable_score(self, vulnerable_groups, rules=None):
         """Score based on vulnerable populations"""
+        rules = rules or self.rules
         if not vulnerable_groups:
             return 0
             
         # Each vulnerable group adds points
         score = 0
         for group in vulnerable_groups:
-            if group == "children":
-                score += 40
-            elif group == "baby":
-                score += 70  # Babies/infants/newborns get CRITICAL priority!
-            elif group == "elderly":
-                score += 35
-            elif group == "pregnant":
-                score += 40
-            elif group == "disabled":
-                score += 35
+            score += rules.vulnerable_points.get(group, 0)
                 
-        return min(100, score)
+        return min(rules.vulnerable_cap, score)
     
-    def _calculate_people_score(self, people_count):
+    def _calculate_people_score(self, people_count, rules=None):
         """Score based on number of people affected"""
+        rules = rules or self.rules
         if people_count is None or people_count <= 0:
-            return 40  # Assume single person if not specified
+            return rules.people_unknown  # Assume single person if not specified
             
-        # Scale: 1 person = 40, 5+ people = 100
-        score = min(100, 40 + (people_count - 1) * 15)
+        # Default scale: 1 person = 40, 5+ people = 100
+        score = min(rules.people_cap,
+                    rules.people_first + (people_count - 1) * rules.people_per_additional)
         return score
     
     def _get_urgency_level(self, total_score):
         """Convert numeric score to urgency level"""
-        if total_score >= 80:
-            return "CRITICAL"
-        elif total_score >= 60:
-            return "HIGH"
-        elif total_score >= 40:
-            return "MEDIUM"
-        else:
-            return "LOW"
+        return self.rules.urgency_level(total_score)
+    
+    def score_batch(self, analyses, timestamp=None):
+        """
+        Score many analyses at once (one timestamp for all)
+        Returns a PriorityBatch; totals and levels are computed up front,
+        full result dicts (reasons, breakdown) only for rows asked for.
+        """
+        return PriorityBatch(self, analyses, timestamp or datetime.now())
+    
+    def max_score(self):
+        """Highest total_score calculate_priority_score can produce"""
+        return self.rules.max_score()
+    
+    def aging_slope(self, urgency_level):
+        """Priority points per hour a pending message of this level gains"""
+        return self.aging_rates.get(urgency_level, 0.0)
+    
+    def effective_score(self, message, now=None):
+        """
+        Priority of a stored message at query time: total_score plus
+        aging_slope * hours waited while pending. Closed form in received_at,
+        so stored records are never rewritten as they age.
+        """
+        priority = message['priority']
+        if message.get('status', 'pending') != 'pending':
+            return priority['total_score']
+        now_hours = epoch_hours(now or datetime.now())
+        waited = max(0.0, now_hours - received_hours(message, now_hours))
+        return round(priority['total_score'] + self.aging_slope(priority['urgency_level']) * waited, 2)
+    
+    def starvation_bound(self, total_score, urgency_level):
+        """
+        Hours after which no newer message that ages no faster can outrank
+        a pending message (None if its level does not age). Only messages
+        already waiting, or arriving within this window, can be served first.
+        """
+        slope = self.aging_slope(urgency_level)
+        if slope <= 0:
+            return None
+        return max(0.0, (self.max_score() - total_score) / slope)
     
     def rank_messages(self, processed_messages):
         """
         Rank a list of processed messages by priority
         Returns sorted list with priority scores
         """
-        ranked = []
-        
-        for msg_data in processed_messages:
-            analysis = msg_data.get('analysis', {})
-            priority = self.calculate_priority_score(analysis)
-            
-            ranked.append({
-                **msg_data,
-                "priority": priority
-            })
-        
-        # Sort by total score (highest first)
-        ranked.sort(key=lambda x: x['priority']['total_score'], reverse=True)
+        batch = self.score_batch([msg_data.get('analysis', {}) for msg_data in processed_messages])
         
-        return ranked
+        # Highest score first (ties keep their input order)
+        return [
+            {**processed_messages[i], "priority": batch.result(i)}
+            for i in batch.ranking()
+        ]
+
+
+def epoch_hours(timestamp):
+    """Naive local datetime -> hours since the epoch (the aging time axis)"""
+    return timestamp.timestamp() / 3600
+
+def received_hours(message, default):
+    """A message's received_at on the aging time axis (default if missing)"""
+    try:
+        return epoch_hours(datetime.fromisoformat(message['received_at']))
+    except (KeyError, TypeError, ValueError):
+        return default
+
+
+class PriorityBatch:
+    """
+    Columnar scoring of many analyses, equal to calling
+    PriorityEngine.calculate_priority_score on each one.
+    Every component is computed with the same float operations in the same
+    order as the scalar path, so totals match to the last bit.
+    """
+
+    def __init__(self, engine, analyses, timestamp):
+        self.engine = engine
+        self.rules = engine.rules  # pinned: a reload mid-batch doesn't mix rule sets
+        self.analyses = list(analyses)
+        self.timestamp = timestamp
+        self._timestamp_iso = timestamp.isoformat()
+        if not NUMPY_AVAILABLE:
+            self._results = [engine.calculate_priority_score(analysis, timestamp)
+                             for analysis in self.analyses]
+            self.raw_scores = [result['total_score'] for result in self._results]
+            self.total_scores = list(self.raw_scores)
+            self.urgency_levels = [result['urgency_level'] for result in self._results]
+            return
+        self._results = None
+        self._compute()
+
+    def _columns(self):
+        """One pass over the dicts: analyses -> arrays"""
+        self.group_index = {group: i for i, group in enumerate(self.rules.groups)}
+        need_codes = {}
+        base, codes, danger, people, extended, group_counts = [], [], [], [], [], []
+        group_rows, group_cols = [], []
+        for row, analysis in enumerate(self.analyses):
+            base.append(analysis.get('urgency_base_score', self.rules.base_default))
+            need_type = analysis.get('need_type', 'unknown')
+            codes.append(need_codes.setdefault(need_type, len(need_codes)))
+            groups = analysis.get('vulnerable_groups', [])
+            group_counts.append(len(groups))
+            for group in groups:
+                col = self.group_index.get(group)
+                if col is not None:
+                    group_rows.append(row)
+                    group_cols.append(col)
+            danger.append(bool(analysis.get('has_immediate_danger', False)))
+            count = analysis.get('estimated_people_count')
+            people.append(0 if count is None else count)
+            extended.append(bool(analysis.get('extended_duration', False)))
+
+        self.need_types = list(need_codes)
+        self.need_code = np.array(codes, dtype=np.intp)
+        self.base = np.array(base, dtype=np.float64)
+        # Per-group counts rather than a bitmask: the scalar path scores a
+        # repeated group twice
+        self.groups = np.zeros((len(self.analyses), len(self.group_index)), dtype=np.int64)
+        np.add.at(self.groups, (np.array(group_rows, dtype=np.intp),
+                                np.array(group_cols, dtype=np.intp)), 1)
+        self.has_groups = np.array(group_counts, dtype=np.int64) > 0
+        self.danger = np.array(danger, dtype=bool)
+        self.people = np.array(people, dtype=np.float64)
+        self.extended = np.array(extended, dtype=bool)
+
+    def _need_mask(self, need_types):
+        table = np.array([need in need_types for need in self.need_types], dtype=bool)
+        return table[self.need_code]
+
+    def _condition_mask(self, name, value):
+        """Rows where one boost condition (see scoring_rules.CONDITIONS) holds"""
+        if name == "need_type":
+            return self._need_mask(value)
+        if name == "extended_duration":
+            return self.extended == value
+        if name == "has_immediate_danger":
+            return self.danger == value
+        if name == "vulnerable_group":
+            return self.groups[:, self.group_index[value]] > 0
+        if name == "any_vulnerable_group":
+            return self.has_groups == value
+        raise ValueError(f"Unknown boost condition: {name}")
+
+    def _compute(self):
+        engine, rules = self.engine, self.rules
+        weights = rules.weights
+        self._columns()
+
+        # Per-need lookup, evaluated once per distinct need type
+        time_table = np.array([engine._calculate_time_sensitivity(need, self.timestamp, rules)
+                               for need in self.need_types], dtype=np.float64)
+
+        self.base_score = self.base * rules.base_scale
+        self.time_score = time_table[self.need_code]
+        # Integer points (the default rules) sum exactly in any order
+        points = np.array([rules.vulnerable_points.get(group, 0) for group in rules.groups])
+        self.vulnerable_score = np.minimum(rules.vulnerable_cap, self.groups @ points)
+        self.danger_score = np.where(self.danger, rules.danger_points, 0)
+        self.people_score = np.where(
+            self.people <= 0, rules.people_unknown,
+            np.minimum(rules.people_cap,
+                       rules.people_first + (self.people - 1) * rules.people_per_additional))
+
+        self.breakdown = {
+            'base_urgency': self.base_score * weights['base_urgency'],
+            'time_sensitivity': self.time_score * weights['time_sensitivity'],
+            'vulnerable_groups': self.vulnerable_score * weights['vulnerable_groups'],
+            'immediate_danger': self.danger_score * weights['immediate_danger'],
+            'people_count': self.people_score * weights['people_count']
+        }
+        # Same left-to-right order as sum(score_breakdown.values())
+        total = self.breakdown['base_urgency'] + self.breakdown['time_sensitivity']
+        total = total + self.breakdown['vulnerable_groups']
+        total = total + self.breakdown['immediate_danger']
+        total = total + self.breakdown['people_count']
+
+        # Boosts in rule order; within a group the first match wins
+        self.boost_masks = []
+        group_taken = {}
+        for boost in rules.boosts:
+            mask = np.ones(len(self.analyses), dtype=bool)
+            for name, value in boost.conditions:
+                mask &= self._condition_mask(name, value)
+            if boost.group is not None:
+                taken = group_taken.get(boost.group)
+                if taken is not None:
+                    mask &= ~taken
+                    group_taken[boost.group] = taken | mask
+                else:
+                    group_taken[boost.group] = mask
+            total = total + np.where(mask, boost.points, 0)
+            self.boost_masks.append((boost, mask))
+
+        self.raw_scores = total
+        # Python's round (correctly rounded), not np.round
+        self.total_scores = [round(score, 2) for score in total.tolist()]
+        self.urgency_levels = np.select(
+            [total >= threshold for threshold, _ in rules.levels],
+            [level for _, level in rules.levels], rules.levels[-1][1]).tolist()
+
+    def __len__(self):
+        return len(self.analyses)
+
+    def ranking(self):
+        """Row indices, highest total_score first (ties in input order)"""
+        return sorted(range(len(self.analyses)), key=self.total_scores.__getitem__, reverse=True)
+
+    def result(self, i):
+        """Row i as calculate_priority_score would return it"""
+        if self._results is not None:
+            return self._results[i]
+        return {
+            "total_score": self.total_scores[i],
+            "urgency_level": self.urgency_levels[i],
+            "score_breakdown": {k: round(float(column[i]), 2) for k, column in self.breakdown.items()},
+            "priority_reasons": self._reasons(i),
+            "timestamp": self._timestamp_iso,
+            "rules_version": self.rules.version
+        }
+
+    def results(self, rows=None):
+        """Result dicts for the given rows (default: all)"""
+        rows = range(len(self.analyses)) if rows is None else rows
+        return [self.result(i) for i in rows]
+
+    def _reasons(self, i):
+        rules = self.rules
+        analysis = self.analyses[i]
+        reasons = []
+        if self.base_score[i] >= rules.base_reason_at:
+            reasons.append("High urgency keywords detected")
+        need_type = analysis.get('need_type', 'unknown')
+        if self.time_score[i] > rules.time_reason_above and need_type in TIME_SENSITIVE_NEEDS:
+            reasons.append(TIME_SENSITIVE_NEEDS[need_type]['reason'])
+        if self.vulnerable_score[i] > 0:
+            groups = analysis.get('vulnerable_groups', [])
+            reasons.append(f"Vulnerable groups present: {', '.join(groups)}")
+        if self.danger_score[i] > 0:
+            reasons.append("Life-threatening situation detected")
+        if self.people_score[i] > rules.people_reason_above:
+            count = analysis.get('estimated_people_count', 0)
+            reasons.append(f"Multiple people affected ({count})")
+        for boost, mask in self.boost_masks:
+            if mask[i]:
+                reasons.append(boost.reason)
+        return reasons
 
 
 # Test function
@@ -0,0 +1,165 @@
+"""
+Priority-ordered in-memory index for MessageDatabase
+Keeps message ids sorted by priority.total_score (highest first) with
+per-location, per-status and per-(location, status) sub-indexes, so
+filtered top-K queries are a bisect plus a slice instead of a full sort.
+AgingIndex orders the pending ones by their wait-time-aged score.
+PERSON 1: AI Backend Development
+"""
+
+import heapq
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+
+
+class PriorityIndex:
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._all = []
+        self._by_location = {}
+        self._by_status = {}
+        self._by_location_status = {}
+        self._entries = {}  # message_id -> (key, location_key, status)
+
+    @staticmethod
+    def location_key(location):
+        return (location or "").lower()
+
+    def __len__(self):
+        return len(self._all)
+
+    def __contains__(self, message_id):
+        return message_id in self._entries
+
+    def _lists_for(self, location_key, status):
+        return (
+            self._all,
+            self._by_location.setdefault(location_key, []),
+            self._by_status.setdefault(status, []),
+            self._by_location_status.setdefault((location_key, status), []),
+        )
+
+    def key_for(self, message_id):
+        """
+        Sort key of a message: (-score, received_at, id). Built only from
+        stored fields, so it stays a valid cursor across restarts and reloads.
+        """
+        entry = self._entries.get(message_id)
+        return None if entry is None else entry[0]
+
+    def add(self, message_id, score, location, status, received_at=None):
+        """Index a message; ties keep arrival order like the old stable sort"""
+        if message_id in self._entries:
+            self.remove(message_id)
+
+        key = (-score, received_at or "", message_id)
+        location_key = self.location_key(location)
+        for ordered in self._lists_for(location_key, status):
+            insort(ordered, key)
+        self._entries[message_id] = (key, location_key, status)
+
+    def remove(self, message_id):
+        entry = self._entries.pop(message_id, None)
+        if entry is None:
+            return
+        key, location_key, status = entry
+        for ordered in self._lists_for(location_key, status):
+            i = bisect_left(ordered, key)
+            if i < len(ordered) and ordered[i] == key:
+                del ordered[i]
+
+    def update(self, message_id, score, location, status, received_at=None):
+        """Re-position a message after its score, location or status changed"""
+        self.add(message_id, score, location, status, received_at)
+
+    def _ordered(self, location=None, status=None):
+        if location is not None and status is not None:
+            return self._by_location_status.get((self.location_key(location), status), [])
+        if location is not None:
+            return self._by_location.get(self.location_key(location), [])
+        if status is not None:
+            return self._by_status.get(status, [])
+        return self._all
+
+    def ids(self, location=None, status=None, limit=None, after=None):
+        """
+        Message ids in priority order, optionally filtered.
+        `after` is a sort key (see key_for) to resume from - O(log N + K).
+        """
+        ordered = self._ordered(location, status)
+        start = bisect_right(ordered, after) if after is not None else 0
+        stop = None if limit is None else start + limit
+        return [key[2] for key in ordered[start:stop]]
+
+
+class AgingIndex:
+    """
+    Pending messages ordered by effective score at query time:
+    total_score + slope * (now - received), both in hours.
+    For a fixed slope, total_score - slope * received is a constant, so
+    each slope bucket is a sorted list that never needs re-sorting as time
+    passes; the top K at any moment is a K-step heap merge across buckets,
+    O(B + K log B) for B distinct slopes (one per urgency level).
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # location key (None: every location) -> {slope: [(-constant, seq, id)]}
+        self._buckets = {}
+        self._entries = {}  # message_id -> (key, slope, location_key)
+        self._next_seq = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, message_id):
+        return message_id in self._entries
+
+    def _lists_for(self, slope, location_key):
+        return [self._buckets.setdefault(loc, {}).setdefault(slope, [])
+                for loc in (None, location_key)]
+
+    def add(self, message_id, score, slope, received_hours, location, seq=None):
+        """Index a pending message; ties keep arrival order"""
+        entry = self._entries.get(message_id)
+        if entry is not None:
+            if seq is None:
+                seq = entry[0][1]
+            self.remove(message_id)
+        if seq is None:
+            seq = self._next_seq
+        self._next_seq = max(self._next_seq, seq + 1)
+
+        key = (-(score - slope * received_hours), seq, message_id)
+        location_key = PriorityIndex.location_key(location)
+        for ordered in self._lists_for(slope, location_key):
+            insort(ordered, key)
+        self._entries[message_id] = (key, slope, location_key)
+
+    def remove(self, message_id):
+        entry = self._entries.pop(message_id, None)
+        if entry is None:
+            return
+        key, slope, location_key = entry
+        for ordered in self._lists_for(slope, location_key):
+            i = bisect_left(ordered, key)
+            if i < len(ordered) and ordered[i] == key:
+                del ordered[i]
+
+    @staticmethod
+    def _at(ordered, slope, now_hours):
+        offset = slope * now_hours
+        for negative, seq, message_id in ordered:
+            yield (negative - offset, seq, message_id)
+
+    def top(self, now_hours, limit=None, location=None):
+        """[(message_id, effective score)], highest first, as of now_hours"""
+        buckets = self._buckets.get(None if location is None
+                                    else PriorityIndex.location_key(location), {})
+        merged = heapq.merge(*(self._at(ordered, slope, now_hours)
+                               for slope, ordered in buckets.items() if ordered))
+        return [(message_id, -negative) for negative, seq, message_id in islice(merged, limit)]
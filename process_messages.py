@@ -69,13 +69,13 @@ def main():
     print("PROCESSING MESSAGES WITH AI")
     print("="*60 + "\n")
     
-    for i, msg_text in enumerate(messages, 1):
+    # AI Analysis - many messages per model call, results in input order
+    analyses = processor.analyze_batched(messages)
+    
+    for i, (msg_text, analysis) in enumerate(zip(messages, analyses), 1):
         print(f"[{i}/{len(messages)}] Processing: {msg_text[:60]}...")
         
         try:
-            # AI Analysis
-            analysis = processor.analyze_message(msg_text)
-            
             # Priority Calculation
             priority = engine.calculate_priority_score(analysis)
             
@@ -8,6 +8,7 @@ import json
 from datetime import datetime
 from math import radians, cos, sin, asin, sqrt
 import os
+from gazetteer import GAZETTEER
 
 class ResourceDonationTracker:
     def __init__(self, 
@@ -15,22 +16,9 @@ class ResourceDonationTracker:
                  safe_zones_file='data/safe_zones.json'):
         self.donations_file = donations_file
         self.safe_zones_file = safe_zones_file
+        self.version = 0  # bumped on every change, used for HTTP ETags
         self.donations = self._load_donations()
         self.safe_zones = self._load_safe_zones()
-        
-        # Approximate coordinates for Chennai locations (lat, lon)
-        self.location_coords = {
-            "Tambaram": (12.9249, 80.1000),
-            "Velachery": (12.9756, 80.2201),
-            "Perungudi": (12.9610, 80.2433),
-            "Saidapet": (13.0210, 80.2231),
-            "Porur": (13.0381, 80.1564),
-            "Adyar": (13.0067, 80.2565),
-            "T Nagar": (13.0418, 80.2341),
-            "Anna Nagar": (13.0850, 80.2101),
-            "Chrompet": (12.9516, 80.1462),
-            "Mylapore": (13.0339, 80.2619)
-        }
     
     def _load_donations(self):
         """Load donations data"""
@@ -92,11 +80,12 @@ class ResourceDonationTracker:
     
     def calculate_distance(self, loc1, loc2):
         """Calculate distance between two locations in km"""
-        if loc1 not in self.location_coords or loc2 not in self.location_coords:
+        coords1, coords2 = GAZETTEER.coords(loc1), GAZETTEER.coords(loc2)
+        if coords1 is None or coords2 is None:
             return None
         
-        lat1, lon1 = self.location_coords[loc1]
-        lat2, lon2 = self.location_coords[loc2]
+        lat1, lon1 = coords1
+        lat2, lon2 = coords2
         
         # Convert to radians
         lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
@@ -128,6 +117,15 @@ class ResourceDonationTracker:
         self._save_donations()
         return need
     
+    def update_resource_need(self, need_id, **changes):
+        """Correct fields of a posted need (location, need_type, urgency, status); None if missing"""
+        for need in self.donations['needs']:
+            if need['id'] == need_id:
+                need.update(changes)
+                self._save_donations()
+                return need
+        return None
+    
     def add_donation_offer(self, donor_name, donor_location, resource_type, 
                           quantity, contact, notes=""):
         """Add a donation offer from a safe zone"""
@@ -243,11 +241,13 @@ class ResourceDonationTracker:
     
     def _save_donations(self):
         """Save donations to file"""
+        self.version += 1
         with open(self.donations_file, 'w') as f:
             json.dump(self.donations, f, indent=2)
     
     def _save_safe_zones(self):
         """Save safe zones to file"""
+        self.version += 1
         with open(self.safe_zones_file, 'w') as f:
             json.dump(self.safe_zones, f, indent=2)
 
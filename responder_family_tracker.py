@@ -8,23 +8,13 @@ import json
 from datetime import datetime
 from math import radians, cos, sin, asin, sqrt
 import os
+from gazetteer import GAZETTEER
 
 class ResponderFamilyTracker:
     def __init__(self, responders_file='data/responders.json'):
         self.responders_file = responders_file
+        self.version = 0  # bumped on every change, used for HTTP ETags
         self.responders = self._load_responders()
-        
-        # Approximate coordinates for Chennai locations (lat, lon)
-        self.location_coords = {
-            "Tambaram": (12.9249, 80.1000),
-            "Velachery": (12.9756, 80.2201),
-            "Perungudi": (12.9610, 80.2433),
-            "Saidapet": (13.0210, 80.2231),
-            "Porur": (13.0381, 80.1564),
-            "Adyar": (13.0067, 80.2565),
-            "T Nagar": (13.0418, 80.2341),
-            "Anna Nagar": (13.0850, 80.2101)
-        }
     
     def _load_responders(self):
         """Load responder data from JSON file"""
@@ -99,11 +89,12 @@ class ResponderFamilyTracker:
     
     def calculate_distance(self, loc1, loc2):
         """Calculate distance between two locations in km using Haversine formula"""
-        if loc1 not in self.location_coords or loc2 not in self.location_coords:
+        coords1, coords2 = GAZETTEER.coords(loc1), GAZETTEER.coords(loc2)
+        if coords1 is None or coords2 is None:
             return None
         
-        lat1, lon1 = self.location_coords[loc1]
-        lat2, lon2 = self.location_coords[loc2]
+        lat1, lon1 = coords1
+        lat2, lon2 = coords2
         
         # Convert to radians
         lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
@@ -166,6 +157,7 @@ class ResponderFamilyTracker:
                 break
         
         # Save updated data
+        self.version += 1
         with open(self.responders_file, 'w') as f:
             json.dump(self.responders, f, indent=2)
     
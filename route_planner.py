@@ -4,6 +4,7 @@ Matches urgent requests with nearest available resources
 """
 
 from math import radians, cos, sin, asin, sqrt
+from gazetteer import GAZETTEER
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     """Calculate distance between two GPS coordinates in kilometers"""
@@ -20,14 +21,18 @@ def haversine_distance(lat1, lon1, lat2, lon2):
 
 def extract_gps_from_location(location_str):
     """Extract GPS coordinates from location string"""
-    try:
-        if '(' in location_str and ')' in location_str:
-            coords = location_str.split('(')[1].split(')')[0]
-            lat, lon = coords.split(',')
-            return float(lat.strip()), float(lon.strip())
-    except:
-        pass
-    return None, None
+    place = GAZETTEER.locate(location_str)
+    if place is None:
+        return None, None
+    return place.lat, place.lon
+
+def resolve_message_location(message):
+    """Structured {name, lat, lon} for a message, or None"""
+    analysis = message.get('analysis', {})
+    if analysis.get('location_info'):
+        return analysis['location_info']
+    return GAZETTEER.location_info(analysis.get('location', 'unknown'),
+                                   message.get('message_text'))
 
 def match_resources(needs, available):
     """Check if available resources match needs"""
@@ -70,11 +75,10 @@ def calculate_delivery_routes(messages, donations):
     ]
     
     for message in urgent_messages:
-        msg_location = message.get('analysis', {}).get('location', 'unknown')
-        msg_lat, msg_lon = extract_gps_from_location(msg_location)
-        
-        if not msg_lat or not msg_lon:
+        msg_place = resolve_message_location(message)
+        if msg_place is None:
             continue
+        msg_lat, msg_lon = msg_place['lat'], msg_place['lon']
             
         needed_resources = message.get('analysis', {}).get('needs_list', [])
         if not needed_resources:
@@ -84,11 +88,10 @@ def calculate_delivery_routes(messages, donations):
         best_match_score = 0
         
         for donation in available_donations:
-            donor_location = donation.get('location', '')
-            donor_lat, donor_lon = extract_gps_from_location(donor_location)
-            
-            if not donor_lat or not donor_lon:
+            donor_place = GAZETTEER.locate(donation.get('location', ''))
+            if donor_place is None:
                 continue
+            donor_lat, donor_lon = donor_place.lat, donor_place.lon
             
             # Calculate distance
             distance = haversine_distance(msg_lat, msg_lon, donor_lat, donor_lon)
@@ -113,11 +116,11 @@ def calculate_delivery_routes(messages, donations):
                     'message_text': message.get('message_text', '')[:100],
                     'priority_score': message.get('priority', {}).get('total_score', 0),
                     'urgency_level': message.get('priority', {}).get('urgency_level', 'MEDIUM'),
-                    'request_location': msg_location.split('(')[0].strip(),
+                    'request_location': msg_place['name'],
                     'needed_resources': needed_resources,
                     'people_count': message.get('analysis', {}).get('estimated_people_count', 'Unknown'),
                     'donor_name': donation.get('donor_name', 'Anonymous'),
-                    'donor_location': donor_location.split('(')[0].strip(),
+                    'donor_location': donor_place.name,
                     'available_resources': available_resources,
                     'distance_km': distance,
                     'estimated_time': f"{int(distance * 2)} minutes" if distance < 10 else f"{int(distance / 40)} hours",
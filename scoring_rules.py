@@ -0,0 +1,270 @@
+"""
+Declarative scoring rules for PriorityEngine
+Weights, points tables, thresholds and the special-case boosts live in a
+JSON file (config.SCORING_RULES_FILE). load_rules() validates and compiles
+it once into lookup tables and a flat, ordered list of boost rules; the
+engine swaps a whole compiled rule set in with one assignment, so a
+reload never mixes old and new rules. RulesWatcher reloads the file when
+it changes on disk.
+PERSON 1: AI Backend Development
+"""
+
+import json
+import os
+import threading
+import zlib
+from collections import namedtuple
+from frozen import FrozenDict
+from config import SCORING_RULES_FILE, RULES_RELOAD_INTERVAL
+
+# Score components, in the order their weighted scores are summed
+COMPONENTS = ("base_urgency", "time_sensitivity", "vulnerable_groups",
+              "immediate_danger", "people_count")
+
+
+class RulesError(ValueError):
+    """The rules file is missing, malformed or inconsistent"""
+
+
+def _flag(field):
+    def predicate(analysis, value):
+        return bool(analysis.get(field, False)) == value
+    return predicate
+
+# Boost conditions: name -> (check of the JSON value, predicate(analysis, value))
+CONDITIONS = {
+    "need_type": (
+        lambda value: isinstance(value, list) and all(isinstance(v, str) for v in value),
+        lambda analysis, value: analysis.get('need_type', 'unknown') in value),
+    "extended_duration": (lambda value: isinstance(value, bool), _flag('extended_duration')),
+    "has_immediate_danger": (lambda value: isinstance(value, bool), _flag('has_immediate_danger')),
+    "vulnerable_group": (
+        lambda value: isinstance(value, str),
+        lambda analysis, value: value in analysis.get('vulnerable_groups', [])),
+    "any_vulnerable_group": (
+        lambda value: isinstance(value, bool),
+        lambda analysis, value: (len(analysis.get('vulnerable_groups', [])) > 0) == value),
+}
+
+
+class Boost(namedtuple("Boost", ["name", "group", "conditions", "points", "reason"])):
+    """
+    Points added after the weighted sum when every condition holds.
+    Among boosts sharing a group only the first that matches applies.
+    conditions: ((name, value), ...)
+    """
+    __slots__ = ()
+
+    def matches(self, analysis):
+        return all(CONDITIONS[name][1](analysis, value) for name, value in self.conditions)
+
+
+class ScoringRules:
+    """A compiled, immutable rule set; `version` tags the scores it produces"""
+
+    def __init__(self, spec, version=None):
+        try:
+            self._compile(spec)
+        except KeyError as e:
+            raise RulesError(f"Invalid scoring rules: missing {e}") from e
+        except (TypeError, ValueError, AttributeError) as e:
+            raise RulesError(f"Invalid scoring rules: {e}") from e
+        if version is None:
+            version = spec.get('version')
+        if version is None:
+            # Untagged file: identical rules get identical tags
+            version = "%08x" % zlib.crc32(json.dumps(spec, sort_keys=True).encode('utf-8'))
+        self.version = str(version)
+
+    @staticmethod
+    def _number(value, name):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{name} must be a number, got {value!r}")
+        return value
+
+    def _compile(self, spec):
+        number = self._number
+        # Frozen: weights change only by loading new rules (memoized scores
+        # are invalidated on that, not on in-place edits)
+        self.weights = FrozenDict((name, number(spec['weights'][name], f"weights.{name}"))
+                                  for name in COMPONENTS)
+
+        base = spec['base_urgency']
+        self.base_default = number(base['default'], "base_urgency.default")
+        self.base_scale = number(base['scale'], "base_urgency.scale")
+        self.base_reason_at = number(base['reason_at'], "base_urgency.reason_at")
+
+        time = spec['time_sensitivity']
+        self.time_critical = number(time['critical_hours'], "time_sensitivity.critical_hours")
+        self.time_other = number(time['other_hours'], "time_sensitivity.other_hours")
+        self.time_default = number(time['not_time_sensitive'], "time_sensitivity.not_time_sensitive")
+        self.time_reason_above = number(time['reason_above'], "time_sensitivity.reason_above")
+
+        vulnerable = spec['vulnerable_groups']
+        self.vulnerable_points = {str(group): number(points, f"vulnerable_groups.points.{group}")
+                                  for group, points in vulnerable['points'].items()}
+        self.vulnerable_cap = number(vulnerable['cap'], "vulnerable_groups.cap")
+
+        self.danger_points = number(spec['immediate_danger']['points'], "immediate_danger.points")
+
+        people = spec['people_count']
+        self.people_unknown = number(people['unknown'], "people_count.unknown")
+        self.people_first = number(people['first'], "people_count.first")
+        self.people_per_additional = number(people['per_additional'], "people_count.per_additional")
+        self.people_cap = number(people['cap'], "people_count.cap")
+        self.people_reason_above = number(people['reason_above'], "people_count.reason_above")
+
+        boosts = []
+        for i, rule in enumerate(spec.get('boosts', [])):
+            name = rule.get('name', f"boost {i}")
+            conditions = []
+            for condition, value in rule['when'].items():
+                if condition not in CONDITIONS:
+                    raise ValueError(f"{name}: unknown condition {condition!r}")
+                if not CONDITIONS[condition][0](value):
+                    raise ValueError(f"{name}: bad value for {condition}: {value!r}")
+                conditions.append((condition, tuple(value) if isinstance(value, list) else value))
+            boosts.append(Boost(name, rule.get('group'), tuple(conditions),
+                                number(rule['points'], f"{name}.points"), str(rule['reason'])))
+        self.boosts = tuple(boosts)
+
+        # Highest threshold first; the lowest level catches everything below
+        levels = sorted(((number(threshold, f"urgency_levels.{level}"), level)
+                         for level, threshold in spec['urgency_levels'].items()), reverse=True)
+        if not levels:
+            raise ValueError("urgency_levels is empty")
+        self.levels = tuple((threshold, level) for threshold, level in levels)
+
+        # Every group the engine needs a column for in batch scoring
+        self.groups = tuple(dict.fromkeys(
+            list(self.vulnerable_points) +
+            [value for boost in self.boosts for name, value in boost.conditions
+             if name == "vulnerable_group"]))
+
+    def apply_boosts(self, analysis):
+        """Boosts that apply to an analysis, in program order"""
+        applied, used_groups = [], set()
+        for boost in self.boosts:
+            if boost.group is not None and boost.group in used_groups:
+                continue
+            if boost.matches(analysis):
+                applied.append(boost)
+                if boost.group is not None:
+                    used_groups.add(boost.group)
+        return applied
+
+    def urgency_level(self, total_score):
+        for threshold, level in self.levels:
+            if total_score >= threshold:
+                return level
+        return self.levels[-1][1]
+
+    def max_score(self):
+        """Highest total score these rules can produce (urgency_base_score <= 10)"""
+        component_max = {
+            "base_urgency": 10 * self.base_scale,
+            "time_sensitivity": max(self.time_critical, self.time_other, self.time_default),
+            "vulnerable_groups": self.vulnerable_cap,
+            "immediate_danger": self.danger_points,
+            "people_count": self.people_cap
+        }
+        total = sum(self.weights[name] * component_max[name] for name in COMPONENTS)
+        grouped = {}
+        for boost in self.boosts:
+            if boost.group is None:
+                total += max(0, boost.points)
+            else:
+                grouped[boost.group] = max(grouped.get(boost.group, 0), boost.points)
+        return total + sum(grouped.values())
+
+
+def load_rules(path=SCORING_RULES_FILE):
+    """Read and compile a rules file (RulesError if it can't be used)"""
+    try:
+        with open(path, 'r') as f:
+            spec = json.load(f)
+    except (OSError, ValueError) as e:
+        raise RulesError(f"Cannot read scoring rules from {path}: {e}") from e
+    if not isinstance(spec, dict):
+        raise RulesError(f"Scoring rules in {path} must be a JSON object")
+    return ScoringRules(spec)
+
+
+class RulesWatcher:
+    """
+    Reloads an engine's rules when the file changes. An invalid file is
+    reported and ignored: the engine keeps scoring with the last good rules.
+    """
+
+    def __init__(self, engine, path=SCORING_RULES_FILE, interval=RULES_RELOAD_INTERVAL,
+                 on_reload=None):
+        """on_reload: called with the new ScoringRules after each swap"""
+        self.engine = engine
+        self.path = path
+        self.interval = interval
+        self.on_reload = on_reload
+        self._signature = self._current_signature()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.reloads = 0
+        self.last_error = None
+
+    def _current_signature(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def reload(self):
+        """Load the file now and swap it in; returns the new rules"""
+        with self._lock:
+            self._signature = self._current_signature()
+            try:
+                rules = load_rules(self.path)
+            except RulesError as e:
+                self.last_error = str(e)
+                raise
+            self.engine.set_rules(rules)
+            self.reloads += 1
+            self.last_error = None
+        if self.on_reload is not None:
+            self.on_reload(rules)
+        return rules
+
+    def check(self):
+        """Reload if the file changed since the last load; True if rules were swapped"""
+        if self._current_signature() == self._signature:
+            return False
+        try:
+            self.reload()
+            return True
+        except RulesError as e:
+            print(f"Error reloading scoring rules (keeping version "
+                  f"{self.engine.rules_version}): {e}")
+            return False
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rules-watcher",
+                                                daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stats(self):
+        return {
+            "version": self.engine.rules_version,
+            "path": self.path,
+            "reloads": self.reloads,
+            "last_error": self.last_error
+        }
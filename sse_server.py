@@ -0,0 +1,171 @@
+"""
+Event stream server
+Serves /api/stream for every connected dashboard from one asyncio event
+loop on its own thread, so an idle client costs a socket and a few
+kilobytes instead of a Flask worker thread. Events still come from the
+EventHub; each subscriber's notify callback wakes its stream coroutine on
+the loop.
+PERSON 2: Frontend Development
+"""
+
+import asyncio
+import logging
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+logger = logging.getLogger(__name__)
+
+MAX_REQUEST_HEAD = 8192   # bytes of request line + headers we accept
+REQUEST_TIMEOUT = 10      # seconds for a client to send its request
+WRITE_TIMEOUT = 30        # seconds a client may leave us unable to write
+
+
+class AsyncSSEServer:
+    def __init__(self, event_hub, host="0.0.0.0", port=5001, path="/api/stream"):
+        """port 0 picks a free port (see .port once started)"""
+        self.event_hub = event_hub
+        self.host = host
+        self.port = port
+        self.path = path
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+        self._closing = False
+        self._connections = {}   # writer -> its stream's wake-up event (loop thread only)
+
+    def start(self):
+        """Bind and start serving on a daemon thread; False if it can't bind"""
+        if self._thread is not None:
+            return self.running
+        self._thread = threading.Thread(target=self._run, name="sse-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            logger.error("Event stream server not started on port %s: %s", self.port, self._error)
+            return False
+        return True
+
+    @property
+    def running(self):
+        return self._server is not None and self._error is None
+
+    def stop(self):
+        """Close the listener and every open stream, then end the loop thread"""
+        if self.running:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    async def _shutdown(self):
+        # Wake and disconnect every stream rather than cancelling its task:
+        # each handler then returns through its normal path and unsubscribes
+        self._closing = True
+        self._server.close()
+        handlers = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for writer, wake in list(self._connections.items()):
+            wake.set()
+            writer.transport.abort()
+        if handlers:
+            await asyncio.wait(handlers, timeout=WRITE_TIMEOUT)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+            self._loop.close()
+            return
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.close()
+
+    async def _handle(self, reader, writer):
+        wake = asyncio.Event()
+        self._connections[writer] = wake
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), REQUEST_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                    asyncio.TimeoutError):
+                return
+            if len(head) > MAX_REQUEST_HEAD:
+                await self._reply(writer, 431, "Request Header Fields Too Large")
+                return
+            lines = head.decode("latin-1").split("\r\n")
+            parts = lines[0].split()
+            if len(parts) != 3:
+                await self._reply(writer, 400, "Bad Request")
+                return
+            method, target, _ = parts
+            url = urlsplit(target)
+            if url.path != self.path:
+                await self._reply(writer, 404, "Not Found")
+                return
+            if method != "GET":
+                await self._reply(writer, 405, "Method Not Allowed")
+                return
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(":")
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+            last_event_id = (headers.get("last-event-id")
+                             or parse_qs(url.query).get("last_event_id", [None])[0])
+            try:
+                last_event_id = int(last_event_id) if last_event_id else None
+            except ValueError:
+                last_event_id = None
+            await self._stream(writer, wake, last_event_id)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        finally:
+            del self._connections[writer]
+            writer.close()
+
+    async def _reply(self, writer, status, reason, extra=""):
+        body = f'{{"success": false, "error": "{reason}"}}'
+        writer.write((f"HTTP/1.1 {status} {reason}\r\n"
+                      "Content-Type: application/json\r\n"
+                      f"Content-Length: {len(body)}\r\n"
+                      "Access-Control-Allow-Origin: *\r\n"
+                      f"{extra}"
+                      "Connection: close\r\n\r\n"
+                      f"{body}").encode())
+        await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+
+    async def _stream(self, writer, wake, last_event_id):
+        hub = self.event_hub
+        loop = asyncio.get_running_loop()
+        subscriber = hub.subscribe(last_event_id,
+                                   notify=lambda: loop.call_soon_threadsafe(wake.set))
+        if subscriber is None:
+            await self._reply(writer, 503, "Too many open event streams", "Retry-After: 30\r\n")
+            return
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\n"
+                         b"Content-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\n"
+                         b"Access-Control-Allow-Origin: *\r\n"
+                         b"Connection: keep-alive\r\n\r\n"
+                         b"retry: 3000\n\n")
+            while not self._closing:
+                wake.clear()
+                frames = hub.pending_frames(subscriber)
+                if frames:
+                    writer.write(frames.encode())
+                await asyncio.wait_for(writer.drain(), WRITE_TIMEOUT)
+                try:
+                    await asyncio.wait_for(wake.wait(), hub.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    writer.write(b": heartbeat\n\n")
+        finally:
+            hub.unsubscribe(subscriber)
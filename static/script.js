@@ -5,25 +5,71 @@ let allMessages = [];
 let currentLocation = 'all';
 let currentStatus = 'all';
 
+// Local copy of every message, kept current by merging deltas
+const messageStore = new Map();
+let syncVersion = null;
+
 // Initialize dashboard on page load
 document.addEventListener('DOMContentLoaded', function() {
     console.log('Dashboard initializing...');
     refreshMessages();
+    connectEventStream();
     
-    // Auto-refresh every 30 seconds
+    // Auto-refresh every 30 seconds (safety net behind the push stream)
     setInterval(refreshMessages, 30000);
 });
 
-// Fetch and display messages
+// Live updates: the server pushes each new/updated message as it is stored.
+// EventSource reconnects by itself and resumes from the last event id.
+// If the server turned us away (too many streams) it gives up; try again
+// later and rely on the 30-second refresh meanwhile.
+let deltaSyncTimer = null;
+
+function connectEventStream() {
+    if (!window.EventSource) {
+        return;
+    }
+    const source = new EventSource('/api/stream');
+    
+    source.addEventListener('message', event => {
+        const msg = JSON.parse(event.data);
+        messageStore.set(msg.id, msg);
+        renderMessages();
+        scheduleDeltaSync();
+    });
+    
+    // We fell too far behind (or the server restarted): catch up via delta sync
+    source.addEventListener('resync', () => refreshMessages());
+    
+    source.onerror = () => {
+        if (source.readyState === EventSource.CLOSED) {
+            setTimeout(connectEventStream, 30000);
+        }
+    };
+}
+
+// Coalesce bursts of pushed events into one delta sync (keeps stats current)
+function scheduleDeltaSync() {
+    if (deltaSyncTimer === null) {
+        deltaSyncTimer = setTimeout(() => {
+            deltaSyncTimer = null;
+            refreshMessages();
+        }, 2000);
+    }
+}
+
+// Fetch only what changed since the last sync and merge it locally
 async function refreshMessages() {
     try {
-        const response = await fetch(`/api/messages?location=${currentLocation}&status=${currentStatus}`);
+        const since = syncVersion === null ? 0 : syncVersion;
+        const response = await fetch(`/api/messages/changes?since=${since}`);
         const data = await response.json();
         
         if (data.success) {
-            allMessages = data.messages;
-            displayMessages(allMessages);
-            updateStatistics();
+            applyDelta(data);
+            if (data.statistics) {
+                displayStatistics(data.statistics);
+            }
         } else {
             showError('Failed to load messages');
         }
@@ -33,6 +79,29 @@ async function refreshMessages() {
     }
 }
 
+function applyDelta(delta) {
+    if (delta.reset) {
+        messageStore.clear();
+    }
+    delta.messages.forEach(msg => messageStore.set(msg.id, msg));
+    delta.removed.forEach(id => messageStore.delete(id));
+    syncVersion = delta.version;
+    
+    if (delta.reset || delta.messages.length > 0 || delta.removed.length > 0) {
+        renderMessages();
+    }
+}
+
+// Apply the current filters to the local copy, highest priority first
+function renderMessages() {
+    const location = currentLocation.toLowerCase();
+    allMessages = Array.from(messageStore.values())
+        .filter(msg => location === 'all' || (msg.analysis.location || '').toLowerCase() === location)
+        .filter(msg => currentStatus === 'all' || msg.status === currentStatus)
+        .sort((a, b) => b.priority.total_score - a.priority.total_score);
+    displayMessages(allMessages);
+}
+
 // Display messages in the UI
 function displayMessages(messages) {
     const container = document.getElementById('messages-container');
@@ -55,11 +124,13 @@ function createMessageCard(msg) {
     const hasMedia = msg.media && msg.media.media_id;
     const mediaIcon = hasMedia ? `<span style="background: #9b59b6; color: white; padding: 4px 8px; border-radius: 12px; font-size: 12px; margin-left: 8px;">📷 Media</span>` : '';
     const manualReview = msg.manually_reviewed ? `<span style="background: #f39c12; color: white; padding: 4px 8px; border-radius: 12px; font-size: 12px; margin-left: 8px;">✓ Reviewed</span>` : '';
+    const preliminary = msg.analysis_tier === 'keyword' ? `<span style="background: #95a5a6; color: white; padding: 4px 8px; border-radius: 12px; font-size: 12px; margin-left: 8px;">⏳ Preliminary</span>` : '';
+    const reports = msg.report_count > 1 ? `<span style="background: #34495e; color: white; padding: 4px 8px; border-radius: 12px; font-size: 12px; margin-left: 8px;">×${msg.report_count} reports</span>` : '';
     
     return `
         <div class="message-card ${urgency}" onclick="showMessageDetail(${msg.id})">
             <div class="message-header">
-                <span class="message-id">ID: ${msg.id}${mediaIcon}${manualReview}</span>
+                <span class="message-id">ID: ${msg.id}${mediaIcon}${manualReview}${reports}${preliminary}</span>
                 <div>
                     <span class="urgency-badge ${urgency}">${urgency}</span>
                     <span class="status-badge ${msg.status}">${msg.status}</span>
@@ -227,25 +298,15 @@ async function updateMessageStatus(messageId, newStatus) {
 function filterMessages() {
     currentLocation = document.getElementById('location-filter').value;
     currentStatus = document.getElementById('status-filter').value;
-    refreshMessages();
+    renderMessages();
 }
 
 // Update statistics display
-async function updateStatistics() {
-    try {
-        const response = await fetch('/api/statistics');
-        const data = await response.json();
-        
-        if (data.success) {
-            const stats = data.statistics;
-            document.getElementById('stat-critical').textContent = stats.by_urgency.CRITICAL || 0;
-            document.getElementById('stat-high').textContent = stats.by_urgency.HIGH || 0;
-            document.getElementById('stat-medium').textContent = stats.by_urgency.MEDIUM || 0;
-            document.getElementById('stat-low').textContent = stats.by_urgency.LOW || 0;
-        }
-    } catch (error) {
-        console.error('Error fetching statistics:', error);
-    }
+function displayStatistics(stats) {
+    document.getElementById('stat-critical').textContent = stats.by_urgency.CRITICAL || 0;
+    document.getElementById('stat-high').textContent = stats.by_urgency.HIGH || 0;
+    document.getElementById('stat-medium').textContent = stats.by_urgency.MEDIUM || 0;
+    document.getElementById('stat-low').textContent = stats.by_urgency.LOW || 0;
 }
 
 // Submit new message modal
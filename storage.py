@@ -0,0 +1,637 @@
+"""
+Pluggable storage backends for MessageDatabase
+JSON file (legacy), write-ahead journal, or SQLite with real indexes
+PERSON 1: AI Backend Development
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from config import (DB_FILE, SQLITE_DB_FILE, JOURNAL_COMPACT_INTERVAL,
+                    JOURNAL_COMPACT_THRESHOLD)
+
+logger = logging.getLogger(__name__)
+
+
+def _empty_data():
+    return {"messages": [], "metadata": {"last_updated": None}}
+
+
+def _sort_by_priority(messages):
+    messages.sort(key=lambda x: x['priority']['total_score'], reverse=True)
+    return messages
+
+
+class JSONStorage:
+    """
+    Single JSON document, rewritten on every change (original format).
+    The parsed document is kept between calls and re-read only when the
+    file's signature shows that someone else rewrote it, so a write costs
+    one serialization instead of a parse plus a serialization.
+    """
+
+    name = "json"
+    rewrites_whole_file = True
+
+    def __init__(self, db_file=DB_FILE):
+        self.db_file = db_file
+        self._data = None
+        self._data_signature = None
+        self._ensure_db_exists()
+
+    def _ensure_db_exists(self):
+        """Create database file if it doesn't exist"""
+        os.makedirs(os.path.dirname(self.db_file) or '.', exist_ok=True)
+        if not os.path.exists(self.db_file):
+            self.save(_empty_data())
+
+    def _read(self):
+        """Parse the JSON file"""
+        try:
+            with open(self.db_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error("Error loading database %s: %s", self.db_file, e)
+            return _empty_data()
+
+    def _current(self):
+        """The parsed document, re-read only if the file changed since we last saw it"""
+        signature = self.signature()
+        if self._data is None or signature != self._data_signature:
+            self._data = self._read()
+            self._data_signature = signature
+        return self._data
+
+    def load(self):
+        """Load data from JSON file (records are shared; treat them as read-only)"""
+        data = self._current()
+        return {"messages": list(data['messages']), "metadata": dict(data['metadata'])}
+
+    def save(self, data):
+        """
+        Save data to JSON file; raises (OSError, TypeError...) if it can't.
+        Written to a temp file and renamed over the old one, so a failed or
+        interrupted save leaves the previous file intact.
+        """
+        tmp_file = self.db_file + ".tmp"
+        try:
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.db_file)
+        except Exception as e:
+            # Memory now holds changes the file doesn't: re-read next time,
+            # and let the caller know the write never happened
+            self._data = None
+            logger.error("Error saving database %s: %s", self.db_file, e)
+            raise
+        self._data = data
+        self._data_signature = self.signature()
+
+    def signature(self):
+        """Changes whenever the file is rewritten, by us or by another script"""
+        try:
+            st = os.stat(self.db_file)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def count_messages(self):
+        return len(self._current()['messages'])
+
+    def insert_message(self, message, last_updated):
+        data = self._current()
+        data['messages'].append(message)
+        data['metadata']['last_updated'] = last_updated
+        self.save(data)
+
+    def update_message(self, message, last_updated):
+        data = self._current()
+        for i, msg in enumerate(data['messages']):
+            if msg['id'] == message['id']:
+                data['messages'][i] = message
+                break
+        data['metadata']['last_updated'] = last_updated
+        self.save(data)
+
+    def update_many(self, messages, last_updated):
+        """Replace several messages with one rewrite of the file"""
+        updated = {message['id']: message for message in messages}
+        data = self._current()
+        data['messages'] = [updated.get(msg['id'], msg) for msg in data['messages']]
+        data['metadata']['last_updated'] = last_updated
+        self.save(data)
+
+    def get_message(self, message_id):
+        for msg in self._current()['messages']:
+            if msg['id'] == message_id:
+                return msg
+        return None
+
+    def get_all_messages(self):
+        return _sort_by_priority(self.load()['messages'])
+
+    def get_messages_by_location(self, location):
+        return [msg for msg in self.get_all_messages()
+                if msg['analysis']['location'].lower() == location.lower()]
+
+    def get_messages_by_status(self, status):
+        return [msg for msg in self.get_all_messages() if msg['status'] == status]
+
+    def get_metadata(self):
+        return dict(self._current()['metadata'])
+
+    def delete_message(self, message_id, last_updated):
+        data = self._current()
+        data['messages'] = [msg for msg in data['messages'] if msg['id'] != message_id]
+        data['metadata']['last_updated'] = last_updated
+        self.save(data)
+
+    def clear(self, last_updated):
+        self.save({"messages": [], "metadata": {"last_updated": last_updated}})
+
+
+class SQLiteStorage:
+    """
+    SQLite backend: one row per message with the full record kept as JSON
+    and the fields the dashboard filters/sorts on promoted to indexed columns
+    """
+
+    name = "sqlite"
+    rewrites_whole_file = False
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY,
+            status TEXT NOT NULL,
+            location TEXT,
+            urgency_level TEXT,
+            total_score REAL,
+            received_at TEXT,
+            body TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_messages_status
+            ON messages (status, total_score DESC);
+        CREATE INDEX IF NOT EXISTS idx_messages_location
+            ON messages (location COLLATE NOCASE, total_score DESC);
+        CREATE INDEX IF NOT EXISTS idx_messages_urgency
+            ON messages (urgency_level);
+        CREATE INDEX IF NOT EXISTS idx_messages_score
+            ON messages (total_score DESC);
+        CREATE TABLE IF NOT EXISTS metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, db_file=SQLITE_DB_FILE, migrate_from=None):
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        is_new = not os.path.exists(db_file)
+        os.makedirs(os.path.dirname(db_file) or '.', exist_ok=True)
+
+        # One shared connection guarded by a lock; Flask serves requests from
+        # several threads.
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+        if is_new and migrate_from and os.path.exists(migrate_from):
+            count = migrate_json_to_sqlite(migrate_from, self)
+            print(f"Migrated {count} messages from {migrate_from} to {db_file}")
+
+    @staticmethod
+    def _row_values(message):
+        priority = message.get('priority', {})
+        return (
+            message['id'],
+            message.get('status', 'pending'),
+            message.get('analysis', {}).get('location'),
+            priority.get('urgency_level'),
+            priority.get('total_score', 0),
+            message.get('received_at'),
+            json.dumps(message),
+        )
+
+    def _query_bodies(self, sql, params=()):
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def _set_last_updated(self, last_updated):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO metadata (key, value) VALUES ('last_updated', ?)",
+            (json.dumps(last_updated),)
+        )
+
+    def load(self):
+        return {"messages": self.get_all_messages(), "metadata": self.get_metadata()}
+
+    def signature(self):
+        # data_version moves only when another connection commits, so it
+        # doubles as an external-writer check
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def count_messages(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def insert_message(self, message, last_updated):
+        self.insert_many([message], last_updated)
+
+    def insert_many(self, messages, last_updated):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages "
+                "(id, status, location, urgency_level, total_score, received_at, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [self._row_values(m) for m in messages]
+            )
+            self._set_last_updated(last_updated)
+
+    def update_message(self, message, last_updated):
+        self.update_many([message], last_updated)
+
+    def update_many(self, messages, last_updated):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE messages SET status = ?, location = ?, urgency_level = ?, "
+                "total_score = ?, received_at = ?, body = ? WHERE id = ?",
+                [values[1:] + values[:1] for values in map(self._row_values, messages)]
+            )
+            self._set_last_updated(last_updated)
+
+    def get_message(self, message_id):
+        bodies = self._query_bodies("SELECT body FROM messages WHERE id = ?", (message_id,))
+        return bodies[0] if bodies else None
+
+    def get_all_messages(self):
+        return self._query_bodies(
+            "SELECT body FROM messages ORDER BY total_score DESC, id"
+        )
+
+    def get_messages_by_location(self, location):
+        return self._query_bodies(
+            "SELECT body FROM messages WHERE location = ? COLLATE NOCASE "
+            "ORDER BY total_score DESC, id",
+            (location,)
+        )
+
+    def get_messages_by_status(self, status):
+        return self._query_bodies(
+            "SELECT body FROM messages WHERE status = ? ORDER BY total_score DESC, id",
+            (status,)
+        )
+
+    def get_metadata(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM metadata").fetchall()
+        metadata = {"last_updated": None}
+        metadata.update({key: json.loads(value) for key, value in rows})
+        return metadata
+
+    def delete_message(self, message_id, last_updated):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages WHERE id = ?", (message_id,))
+            self._set_last_updated(last_updated)
+
+    def clear(self, last_updated):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages")
+            self._set_last_updated(last_updated)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JournaledStorage:
+    """
+    Write-ahead log backend
+    The JSON file stays the snapshot (same format as JSONStorage). Every
+    change is appended to <db_file>.wal as one NDJSON record and fsync'd with
+    group commit: whichever writer reaches the sync first flushes the records
+    of everyone queued behind it. A background compactor periodically folds
+    the log into a fresh snapshot. Startup loads the snapshot and replays the
+    log tail, so write cost no longer depends on how many messages exist.
+    Another writer (add_demo_data.py, a second process) is noticed when the
+    snapshot or log no longer match what this process last left on disk;
+    the state is then reloaded from disk rather than overwritten.
+    """
+
+    name = "journal"
+    rewrites_whole_file = False
+
+    def __init__(self, db_file=DB_FILE,
+                 compact_interval=JOURNAL_COMPACT_INTERVAL,
+                 compact_threshold=JOURNAL_COMPACT_THRESHOLD):
+        self.db_file = db_file
+        self.log_file = db_file + ".wal"
+        self.compacting_file = db_file + ".wal.compacting"
+        self.compact_interval = compact_interval
+        self.compact_threshold = compact_threshold
+
+        self._lock = threading.RLock()           # guards memory + log handle
+        self._sync_cond = threading.Condition()  # group commit bookkeeping
+        self._compact_lock = threading.Lock()
+        self._written_seq = 0
+        self._synced_seq = 0
+        self._syncing = False
+        self._log_records = 0
+        self._reloads = 0
+
+        self._recover()
+        self._log = open(self.log_file, 'a', encoding='utf-8')
+        self._disk_signature = self._stat_files()
+
+        self._stop = threading.Event()
+        self._compact_requested = threading.Event()
+        self._compactor = threading.Thread(target=self._compact_loop,
+                                           name="journal-compactor", daemon=True)
+        self._compactor.start()
+
+    # ---- recovery -------------------------------------------------------
+
+    def _recover(self):
+        """Load the snapshot, then replay any log left by a crash"""
+        self._log_records = 0
+        snapshot = JSONStorage(self.db_file).load()
+        self._data = {"messages": snapshot.get('messages', []),
+                      "metadata": snapshot.get('metadata', {"last_updated": None})}
+        self._positions = {msg['id']: i for i, msg in enumerate(self._data['messages'])}
+
+        # An interrupted compaction leaves its log behind; it is older than the
+        # live log, and replay is idempotent, so apply it first.
+        for path in (self.compacting_file, self.log_file):
+            self._log_records += self._replay(path)
+
+    def _replay(self, path):
+        if not os.path.exists(path):
+            return 0
+        applied = 0
+        good_offset = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn final write from a crash - it was never acknowledged
+                        print(f"Ignoring truncated journal record in {path}")
+                        break
+                    self._apply(record)
+                    applied += 1
+                good_offset += len(line)
+        if good_offset < os.path.getsize(path):
+            # Cut the torn tail so new appends start on a clean line
+            with open(path, 'r+b') as f:
+                f.truncate(good_offset)
+        return applied
+
+    def _apply(self, record):
+        op = record['op']
+        if op == 'upsert':
+            message = record['message']
+            position = self._positions.get(message['id'])
+            if position is None:
+                self._positions[message['id']] = len(self._data['messages'])
+                self._data['messages'].append(message)
+            else:
+                self._data['messages'][position] = message
+        elif op == 'delete':
+            position = self._positions.pop(record['id'], None)
+            if position is not None:
+                messages = self._data['messages']
+                last = messages.pop()
+                if position < len(messages):
+                    messages[position] = last
+                    self._positions[last['id']] = position
+        elif op == 'clear':
+            self._data['messages'] = []
+            self._positions = {}
+        self._data['metadata']['last_updated'] = record.get('last_updated')
+
+    # ---- write path -----------------------------------------------------
+
+    def _append(self, record):
+        self._append_many([record])
+
+    def _append_many(self, records):
+        """Write records back to back; one durability wait covers them all"""
+        lines = [json.dumps(record) + "\n" for record in records]
+        with self._lock:
+            for line, record in zip(lines, records):
+                self._log.write(line)
+                self._apply(record)
+            self._written_seq += len(records)
+            self._log_records += len(records)
+            seq = self._written_seq
+            self._log.flush()
+            self._disk_signature = self._stat_files()
+        self._wait_durable(seq)
+        if self._log_records >= self.compact_threshold:
+            self._compact_requested.set()
+
+    def _wait_durable(self, seq):
+        """Group commit: one fsync covers every record written before it"""
+        with self._sync_cond:
+            while self._synced_seq < seq:
+                if self._syncing:
+                    self._sync_cond.wait()
+                    continue
+                self._syncing = True
+                self._sync_cond.release()
+                durable = self._synced_seq
+                try:
+                    with self._lock:
+                        self._log.flush()
+                        target = self._written_seq
+                        # dup() so a concurrent log rotation can't close it under us
+                        fd = os.dup(self._log.fileno())
+                    try:
+                        os.fsync(fd)
+                    finally:
+                        os.close(fd)
+                    durable = target
+                finally:
+                    self._sync_cond.acquire()
+                    self._syncing = False
+                    self._synced_seq = max(self._synced_seq, durable)
+                    self._sync_cond.notify_all()
+
+    def insert_message(self, message, last_updated):
+        self._append({"op": "upsert", "message": message, "last_updated": last_updated})
+
+    def update_message(self, message, last_updated):
+        self._append({"op": "upsert", "message": message, "last_updated": last_updated})
+
+    def update_many(self, messages, last_updated):
+        self._append_many([{"op": "upsert", "message": message, "last_updated": last_updated}
+                           for message in messages])
+
+    def delete_message(self, message_id, last_updated):
+        self._append({"op": "delete", "id": message_id, "last_updated": last_updated})
+
+    def clear(self, last_updated):
+        self._append({"op": "clear", "last_updated": last_updated})
+
+    # ---- compaction -----------------------------------------------------
+
+    def _compact_loop(self):
+        while not self._stop.is_set():
+            self._compact_requested.wait(self.compact_interval)
+            self._compact_requested.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Error compacting journal: {e}")
+
+    def compact(self):
+        """Fold the log into a new snapshot without blocking writers for long"""
+        with self._compact_lock:
+            with self._lock:
+                # Never fold our log over a snapshot someone else just wrote
+                self._check_external_writes()
+                if self._log_records == 0 and not os.path.exists(self.compacting_file):
+                    return
+                # Rotate the log; writes from here on go to a fresh file
+                self._log.flush()
+                os.fsync(self._log.fileno())
+                self._log.close()
+                if not os.path.exists(self.compacting_file):
+                    os.replace(self.log_file, self.compacting_file)
+                else:
+                    # Earlier compaction died after rotating: keep both logs
+                    with open(self.compacting_file, 'a', encoding='utf-8') as old, \
+                            open(self.log_file, 'r', encoding='utf-8') as new:
+                        old.write(new.read())
+                    os.remove(self.log_file)
+                self._log = open(self.log_file, 'a', encoding='utf-8')
+                self._log_records = 0
+                self._disk_signature = self._stat_files()
+                # Records are replaced, never mutated in place, so a shallow copy
+                # is a consistent view to serialize outside the lock.
+                snapshot = {"messages": list(self._data['messages']),
+                            "metadata": dict(self._data['metadata'])}
+
+            tmp_file = self.db_file + ".tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(snapshot, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.db_file)
+            os.remove(self.compacting_file)
+            with self._lock:
+                self._disk_signature = self._stat_files()
+
+    def close(self):
+        self._stop.set()
+        self._compact_requested.set()
+        self._compactor.join(timeout=5)
+        self.compact()
+        with self._lock:
+            self._log.close()
+
+    # ---- external writers -----------------------------------------------
+
+    def _stat_files(self):
+        """(mtime_ns, size) of the snapshot and the live log"""
+        stats = []
+        for path in (self.db_file, self.log_file):
+            try:
+                st = os.stat(path)
+                stats.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stats.append(None)
+        return tuple(stats)
+
+    def _check_external_writes(self):
+        """Reload from disk if someone else changed the files (caller holds _lock)"""
+        self._log.flush()
+        if self._stat_files() == self._disk_signature:
+            return False
+        self._log.close()
+        self._recover()
+        self._log = open(self.log_file, 'a', encoding='utf-8')
+        self._disk_signature = self._stat_files()
+        self._reloads += 1
+        return True
+
+    def signature(self):
+        """
+        Changes when the files were modified by another writer (which also
+        reloads them), but not on this process's own writes or compaction
+        """
+        if not self._compact_lock.acquire(blocking=False):
+            # Compaction is rewriting the files; check again next time
+            return self._reloads
+        try:
+            with self._lock:
+                self._check_external_writes()
+                return self._reloads
+        finally:
+            self._compact_lock.release()
+
+    # ---- reads (served from memory) -------------------------------------
+    # Records are replaced, never mutated in place (MessageDatabase copies
+    # a record before changing it), so reads share them instead of copying
+
+    def load(self):
+        with self._lock:
+            return {"messages": list(self._data['messages']),
+                    "metadata": dict(self._data['metadata'])}
+
+    def count_messages(self):
+        with self._lock:
+            return len(self._data['messages'])
+
+    def get_message(self, message_id):
+        with self._lock:
+            position = self._positions.get(message_id)
+            return None if position is None else self._data['messages'][position]
+
+    def get_all_messages(self):
+        return _sort_by_priority(self.load()['messages'])
+
+    def get_messages_by_location(self, location):
+        return [msg for msg in self.get_all_messages()
+                if msg['analysis']['location'].lower() == location.lower()]
+
+    def get_messages_by_status(self, status):
+        return [msg for msg in self.get_all_messages() if msg['status'] == status]
+
+    def get_metadata(self):
+        with self._lock:
+            return dict(self._data['metadata'])
+
+
+def migrate_json_to_sqlite(json_file=DB_FILE, sqlite_storage=None):
+    """
+    One-shot copy of the legacy JSON database into SQLite
+    Returns: number of messages migrated
+    """
+    if sqlite_storage is None:
+        sqlite_storage = SQLiteStorage()
+
+    data = JSONStorage(json_file).load()
+    messages = data.get('messages', [])
+    sqlite_storage.insert_many(messages, data.get('metadata', {}).get('last_updated'))
+    return len(messages)
+
+
+def create_storage(backend, db_file=DB_FILE):
+    """Build the storage backend named in config.DB_BACKEND"""
+    if backend == "sqlite":
+        return SQLiteStorage(SQLITE_DB_FILE, migrate_from=db_file)
+    if backend == "json":
+        return JSONStorage(db_file)
+    if backend == "journal":
+        return JournaledStorage(db_file)
+    raise ValueError(f"Unknown database backend: {backend}")
@@ -0,0 +1,70 @@
+"""
+Event stream server: many idle streams share one loop thread, every one
+of them receives a published event, and resuming from Last-Event-ID
+replays what was missed
+"""
+
+import socket
+import threading
+
+from event_hub import EventHub
+from sse_server import AsyncSSEServer
+
+def open_stream(port, last_event_id=None):
+    sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+    resume = f"Last-Event-ID: {last_event_id}\r\n" if last_event_id is not None else ""
+    sock.sendall(f"GET /api/stream HTTP/1.1\r\nHost: localhost\r\n{resume}\r\n".encode())
+    return sock
+
+def read_until(sock, marker):
+    data = b""
+    while marker not in data:
+        chunk = sock.recv(4096)
+        assert chunk, f"stream closed before {marker!r}: {data!r}"
+        data += chunk
+    return data
+
+def test_idle_streams_share_one_thread():
+    hub = EventHub(heartbeat_interval=60)
+    server = AsyncSSEServer(hub, host="127.0.0.1", port=0)
+    assert server.start()
+    try:
+        threads = threading.active_count()
+        streams = [open_stream(server.port) for _ in range(200)]
+        for sock in streams:
+            head = read_until(sock, b"retry: 3000\n\n")
+            assert head.startswith(b"HTTP/1.1 200 OK")
+            assert b"Content-Type: text/event-stream" in head
+        assert hub.client_count() == 200
+        assert threading.active_count() == threads
+
+        event_id = hub.publish("message", {"id": 7})
+        for sock in streams:
+            assert f"id: {event_id}\nevent: message\n".encode() in read_until(sock, b"\n\n")
+        for sock in streams:
+            sock.close()
+    finally:
+        server.stop()
+
+def test_resume_and_rejections():
+    hub = EventHub(heartbeat_interval=60, max_clients=1)
+    server = AsyncSSEServer(hub, host="127.0.0.1", port=0)
+    assert server.start()
+    try:
+        first = hub.publish("message", {"id": 1})
+        hub.publish("message", {"id": 2})
+        sock = open_stream(server.port, last_event_id=first)
+        data = read_until(sock, b'"id": 2}\n\n')
+        assert b'"id": 1}' not in data
+
+        full = open_stream(server.port)
+        assert read_until(full, b"\r\n\r\n").startswith(b"HTTP/1.1 503")
+        full.close()
+        sock.close()
+
+        other = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+        other.sendall(b"GET /api/messages HTTP/1.1\r\n\r\n")
+        assert read_until(other, b"\r\n\r\n").startswith(b"HTTP/1.1 404")
+        other.close()
+    finally:
+        server.stop()
@@ -0,0 +1,75 @@
+"""
+Equivalence test: PriorityEngine.score_batch must give exactly what
+calculate_priority_score gives, message by message
+"""
+
+import json
+from datetime import datetime
+
+import priority_engine
+from analysis_samples import sample
+from config import SCORING_RULES_FILE
+from priority_engine import PriorityEngine
+from scoring_rules import ScoringRules
+
+def test_batch_matches_scalar_every_hour():
+    engine = PriorityEngine()
+    analyses = sample()
+    for hour in range(24):
+        timestamp = datetime(2026, 2, 6, hour, 30)
+        batch = engine.score_batch(analyses, timestamp)
+        for i, analysis in enumerate(analyses):
+            assert batch.result(i) == engine.calculate_priority_score(analysis, timestamp), analysis
+
+def test_batch_matches_scalar_custom_rules():
+    with open(SCORING_RULES_FILE) as f:
+        spec = json.load(f)
+    spec["version"] = "custom"
+    spec["weights"]["people_count"] = 0.17
+    spec["vulnerable_groups"]["points"]["teenager"] = 10
+    spec["boosts"].insert(0, {"name": "danger_rescue", "group": "extended_duration",
+                              "when": {"need_type": ["rescue"], "has_immediate_danger": True,
+                                       "extended_duration": True},
+                              "points": 20.5, "reason": "Trapped for days"})
+    spec["boosts"].append({"name": "elderly_alone", "when": {"vulnerable_group": "elderly",
+                                                             "any_vulnerable_group": True},
+                           "points": 3, "reason": "Elderly"})
+    spec["urgency_levels"] = {"CRITICAL": 90, "HIGH": 65, "LOW": 10, "MINIMAL": 0}
+    engine = PriorityEngine(rules=ScoringRules(spec))
+    analyses = sample(seed=15)
+    timestamp = datetime(2026, 2, 6, 22, 0)
+    batch = engine.score_batch(analyses, timestamp)
+    for i, analysis in enumerate(analyses):
+        assert batch.result(i) == engine.calculate_priority_score(analysis, timestamp), analysis
+
+def test_totals_without_building_results():
+    engine = PriorityEngine()
+    analyses = sample(seed=12)
+    timestamp = datetime(2026, 2, 6, 19, 0)
+    batch = engine.score_batch(analyses, timestamp)
+    expected = [engine.calculate_priority_score(analysis, timestamp) for analysis in analyses]
+    assert batch.total_scores == [result["total_score"] for result in expected]
+    assert batch.urgency_levels == [result["urgency_level"] for result in expected]
+
+def test_rank_messages_order():
+    engine = PriorityEngine()
+    messages = [{"id": i, "analysis": analysis} for i, analysis in enumerate(sample(500, seed=13))]
+    ranked = engine.rank_messages(messages)
+    timestamp = datetime.fromisoformat(ranked[0]["priority"]["timestamp"])
+    expected = sorted(messages, key=lambda msg: engine.calculate_priority_score(
+        msg["analysis"], timestamp)["total_score"], reverse=True)
+    assert [msg["id"] for msg in ranked] == [msg["id"] for msg in expected]
+
+def test_empty_batch():
+    engine = PriorityEngine()
+    assert len(engine.score_batch([])) == 0
+    assert engine.rank_messages([]) == []
+
+def test_scalar_fallback_without_numpy(monkeypatch):
+    engine = PriorityEngine()
+    analyses = sample(200, seed=14)
+    timestamp = datetime(2026, 2, 6, 7, 0)
+    monkeypatch.setattr(priority_engine, "NUMPY_AVAILABLE", False)
+    batch = engine.score_batch(analyses, timestamp)
+    assert batch.results() == [engine.calculate_priority_score(a, timestamp) for a in analyses]
+
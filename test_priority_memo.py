@@ -0,0 +1,66 @@
+"""
+Memoized priority scoring: cached results must equal uncached ones, and
+new rules must never be served stale scores
+"""
+
+import copy
+import json
+from datetime import datetime
+
+import pytest
+
+from analysis_samples import sample
+from config import SCORING_RULES_FILE
+from priority_engine import PriorityEngine
+from scoring_rules import ScoringRules
+
+# Same features for the score, different text in the reasons
+LOOKALIKES = [
+    {"need_type": "food", "estimated_people_count": 3},
+    {"need_type": "food", "estimated_people_count": 3.0},
+    {"need_type": "food", "estimated_people_count": 250},
+    {"need_type": "water", "vulnerable_groups": ["baby", "elderly"]},
+    {"need_type": "water", "vulnerable_groups": ["elderly", "baby"]},
+    {"need_type": "water", "vulnerable_groups": ["elderly", "baby", "baby"]},
+    {"need_type": "water", "vulnerable_groups": ["elderly", "teenager"]},
+]
+
+def test_memo_matches_uncached():
+    cached, uncached = PriorityEngine(), PriorityEngine(memo_size=0)
+    analyses = LOOKALIKES + sample(2000, seed=21)
+    for hour in (3, 7, 12, 19):
+        timestamp = datetime(2026, 2, 6, hour, 15)
+        for _ in range(2):  # second pass is served from the memo
+            for analysis in analyses:
+                assert (cached.calculate_priority_score(analysis, timestamp)
+                        == uncached.calculate_priority_score(analysis, timestamp)), analysis
+    assert cached.memo_stats()["hits"] > 0
+
+def test_shared_results_are_immutable():
+    engine = PriorityEngine()
+    timestamp = datetime(2026, 2, 6, 21, 0)
+    first = engine.calculate_priority_score(LOOKALIKES[3], timestamp)
+    second = engine.calculate_priority_score(LOOKALIKES[3], datetime(2026, 2, 6, 22, 0))
+    assert first["priority_reasons"] is second["priority_reasons"]
+    assert second["timestamp"] == "2026-02-06T22:00:00"
+    with pytest.raises(TypeError):
+        first["priority_reasons"].append("x")
+    with pytest.raises(TypeError):
+        first["score_breakdown"].update(base_urgency=0)
+    assert copy.deepcopy(first) == first
+
+def test_new_rules_invalidate():
+    engine = PriorityEngine()
+    timestamp = datetime(2026, 2, 6, 21, 0)
+    analysis = {"need_type": "rescue", "has_immediate_danger": True}
+    before = engine.calculate_priority_score(analysis, timestamp)
+
+    with open(SCORING_RULES_FILE) as f:
+        spec = json.load(f)
+    spec["immediate_danger"]["points"] = 50
+    engine.set_rules(ScoringRules(spec, version="test"))
+    after = engine.calculate_priority_score(analysis, timestamp)
+    assert after["total_score"] < before["total_score"]
+    assert after["rules_version"] == "test"
+    assert engine.memo_stats()["invalidations"] == 1
+
@@ -0,0 +1,46 @@
+"""
+Time-window re-scoring: scores stored before rules were versioned are
+left alone at startup, re-scored after a rules reload, and the JSON
+backend is rewritten once per pass
+"""
+
+import json
+from datetime import datetime
+
+from config import SCORING_RULES_FILE
+from database import MessageDatabase
+from priority_engine import PriorityEngine
+from scoring_rules import ScoringRules
+from time_rescorer import TimeWindowRescorer
+
+def make_db(tmp_path, engine, now, count):
+    db = MessageDatabase(str(tmp_path / "messages_db.json"), backend="json",
+                         priority_engine=engine)
+    for i in range(count):
+        analysis = {"need_type": ["rescue", "medical", "shelter"][i % 3],
+                    "urgency_base_score": 5 + i % 5, "location": "Adyar"}
+        priority = dict(engine.calculate_priority_score(analysis, now))
+        del priority["rules_version"]   # as stored before scores were versioned
+        db.add_message(f"message {i}", analysis, priority)
+    return db
+
+def test_legacy_scores_are_not_rewritten_at_startup(tmp_path):
+    engine = PriorityEngine()
+    now = datetime(2026, 2, 6, 14, 0)
+    db = make_db(tmp_path, engine, now, 30)
+    rescorer = TimeWindowRescorer(db, engine)
+    saves = []
+    save = db.storage.save
+    db.storage.save = lambda data: (saves.append(1), save(data))
+
+    assert rescorer.rescore(None, now) == 0
+    assert saves == []
+
+    with open(SCORING_RULES_FILE) as f:
+        spec = json.load(f)
+    spec["immediate_danger"]["points"] = 50
+    engine.set_rules(ScoringRules(spec, version="reloaded"))
+    rescorer.batch_size = 7
+    assert rescorer.rescore(None, now) == 30
+    assert len(saves) == 1
+    assert {msg["priority"]["rules_version"] for msg in db.get_all_messages()} == {"reloaded"}
@@ -0,0 +1,222 @@
+"""
+Time-window re-scoring
+A message's time sensitivity depends on the hour (nighttime shelter, meal
+times) but is scored once, at ingest. The rescorer knows for each need type
+the next hour at which that score changes, sleeps until the earliest one,
+then re-scores in one batch only the open messages of the need types whose
+window just changed. On request (new scoring rules) it re-scores every
+open message scored under an older rules version, off the request path.
+PERSON 1: AI Backend Development
+"""
+
+import threading
+from datetime import datetime
+from config import TIME_SENSITIVE_NEEDS, RESCORE_MAX_SLEEP, RESCORE_BATCH_SIZE
+
+MAX_ATTEMPTS = 3   # re-reads when messages change under a batch
+
+
+class TimeWindowRescorer:
+    def __init__(self, db, priority_engine, event_hub=None, clock=datetime.now,
+                 max_sleep=RESCORE_MAX_SLEEP, batch_size=RESCORE_BATCH_SIZE):
+        """
+        clock: returns the current (naive, local) datetime
+        max_sleep: longest sleep in seconds before re-checking the clock
+        batch_size: messages scored and written per database call
+        """
+        self.db = db
+        self.priority_engine = priority_engine
+        self.event_hub = event_hub
+        self.clock = clock
+        self.max_sleep = max_sleep
+        self.batch_size = batch_size
+        self.boundaries = {}    # need type -> next datetime its time score changes
+        self._planned_at = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._full_rescore = False
+        self._thread = None
+        # Scores stored before they carried a rules_version were made with
+        # the rules this process started with; only a reload makes them stale,
+        # so a restart doesn't re-score (and rewrite) every open message
+        self.legacy_rules_version = priority_engine.rules_version
+        self.runs = 0
+        self.rescored = 0
+        self.last_run = None
+
+    def plan(self, now):
+        """Next time-score change after now for every time-sensitive need"""
+        boundaries = {}
+        for need_type in TIME_SENSITIVE_NEEDS:
+            boundary = self.priority_engine.next_time_change(need_type, now)
+            if boundary is not None:
+                boundaries[need_type] = boundary
+        with self._lock:
+            self.boundaries = boundaries
+            self._planned_at = now
+
+    def next_boundary(self):
+        with self._lock:
+            return min(self.boundaries.values(), default=None)
+
+    def rescore(self, need_types=None, now=None):
+        """
+        Re-score open messages of need_types (default: all) whose stored
+        score is stale: computed in a different time window, or under an
+        older rules version. Scores and writes batch_size messages at a
+        time, so request threads never wait long on the database (in one
+        write on the JSON backend, which rewrites the whole file anyway).
+        Returns the number of messages updated.
+        """
+        now = now or self.clock()
+        if need_types is not None:
+            need_types = set(need_types)
+        updated = []
+        for _ in range(MAX_ATTEMPTS):
+            rules_version = self.priority_engine.rules_version
+            stale = [msg for msg in self.db.get_open_messages(need_types)
+                     if self._is_stale(msg, now, rules_version)]
+            if not stale:
+                break
+            # Batches only help backends that write incrementally; the JSON
+            # file would be rewritten once per batch
+            batch_size = len(stale) if self.db.storage.rewrites_whole_file else self.batch_size
+            written = 0
+            for start in range(0, len(stale), batch_size):
+                chunk = stale[start:start + batch_size]
+                batch = self.priority_engine.score_batch([msg['analysis'] for msg in chunk], now)
+                records = self.db.update_message_priorities([
+                    (msg['id'], batch.result(i), msg.get('change_seq'))
+                    for i, msg in enumerate(chunk)
+                ])
+                written += len(records)
+                updated += records
+            if written == len(stale):
+                break
+
+        if self.event_hub is not None and updated:
+            if len(updated) > self.batch_size:
+                # Cheaper for dashboards to refetch than to apply each update
+                self.event_hub.publish('resync', {})
+            else:
+                for msg in updated:
+                    self.event_hub.publish('message', msg)
+        with self._lock:
+            self.runs += 1
+            self.rescored += len(updated)
+            self.last_run = now
+        return len(updated)
+
+    def _is_stale(self, msg, now, rules_version):
+        priority = msg['priority']
+        if priority.get('rules_version', self.legacy_rules_version) != rules_version:
+            return True
+        try:
+            scored_at = datetime.fromisoformat(priority['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            return True
+        return self.priority_engine.time_score_changed(msg['analysis'].get('need_type'),
+                                                       scored_at, now)
+
+    def request_full_rescore(self):
+        """
+        Re-score every stale open message on the background thread (e.g.
+        after new scoring rules were loaded); returns at once
+        """
+        with self._lock:
+            if self._thread is None:
+                # Time-window re-scoring is off: a one-off pass instead
+                threading.Thread(target=self._rescore_logged, args=(None, self.clock()),
+                                 name="full-rescore", daemon=True).start()
+                return
+            self._full_rescore = True
+        self._wake.set()
+
+    def start(self):
+        """Start the background thread (once)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="time-rescorer",
+                                                daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        now = self.clock()
+        # Catch up on scores from an earlier window or older rules (e.g.
+        # before a restart)
+        self._rescore_logged(None, now)
+        self.plan(now)
+        while True:
+            boundary = self.next_boundary()
+            wait = self.max_sleep
+            if boundary is not None:
+                wait = min(wait, (boundary - self.clock()).total_seconds())
+            self._wake.wait(max(0, wait))
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+
+            now = self.clock()
+            with self._lock:
+                full_rescore, self._full_rescore = self._full_rescore, False
+            if full_rescore:
+                self._rescore_logged(None, now)
+            if now < self._planned_at:
+                # Clock went back: the planned boundaries are too far away
+                self._rescore_logged(None, now)
+                self.plan(now)
+                continue
+            due = [need_type for need_type, at in self.boundaries.items() if at <= now]
+            if due:
+                self._rescore_logged(due, now)
+                self.plan(now)
+
+    def _rescore_logged(self, need_types, now):
+        try:
+            self.rescore(need_types, now)
+        except Exception as e:
+            print(f"Error re-scoring time-sensitive messages: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "rescored": self.rescored,
+                "last_run": self.last_run.isoformat() if self.last_run else None,
+                "next_boundaries": {need_type: at.isoformat()
+                                    for need_type, at in sorted(self.boundaries.items())}
+            }
+
+
+# Test function
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from datetime import timedelta
+    from database import MessageDatabase
+    from priority_engine import PriorityEngine
+
+    engine = PriorityEngine()
+    db = MessageDatabase(os.path.join(tempfile.mkdtemp(), "messages_db.json"), backend="json")
+    evening = datetime(2026, 2, 6, 17, 30)
+    for need_type in ["shelter", "medical", "food", "rescue"]:
+        analysis = {"need_type": need_type, "urgency_base_score": 6, "location": "Tambaram"}
+        db.add_message(f"{need_type} request", analysis,
+                       engine.calculate_priority_score(analysis, evening))
+
+    rescorer = TimeWindowRescorer(db, engine)
+    rescorer.plan(evening)
+    boundary = rescorer.next_boundary()
+    print("=== Testing Time-Window Rescorer ===\n")
+    print(f"Next boundaries: {rescorer.stats()['next_boundaries']}")
+    print(f"Re-scored at {boundary:%H:%M}: {rescorer.rescore(None, boundary)}")
+    print(f"Re-scored again a minute later: {rescorer.rescore(None, boundary + timedelta(minutes=1))}")
+    for msg in db.get_all_messages():
+        print(f"  {msg['analysis']['need_type']:<8} {msg['priority']['total_score']}")